@@ -1,17 +1,38 @@
 """Core analysis logic for function history tracking."""
 
-from dataclasses import dataclass
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime
+from functools import cache, partial
 
+from git import Blob, Repo
+
+from .cache import history_cache_key, load_cached_history, save_cached_history
 from .git_ops import (
     CommitInfo,
     DiffHunk,
+    get_blob_at_commit,
     get_diff_hunks,
-    get_file_at_commit,
+    get_file_blob_shas,
     get_file_commits,
+    get_head_sha,
     get_repo,
+    read_blob,
+    shift_range_past_hunks,
 )
 from .parser import FunctionInfo, detect_language, find_function
 
+# Below this many commits, worker start-up costs more than the walk itself
+PARALLEL_MIN_COMMITS = 16
+
+# find_function results keyed by (blob sha, function name, language).
+# Most commits leave the file unchanged from an earlier version, so the same
+# blob would otherwise be parsed over and over.
+FIND_CACHE_SIZE = 512
+_find_cache: dict[tuple[str, str, str], FunctionInfo | None] = {}
+
 
 @dataclass
 class FunctionChange:
@@ -38,7 +59,13 @@ class FunctionHistory:
 
 
 def analyze_function_history(
-    repo_path: str, file_path: str, func_name: str
+    repo_path: str,
+    file_path: str,
+    func_name: str,
+    jobs: int | None = None,
+    use_cache: bool = True,
+    since: datetime | None = None,
+    max_commits: int | None = None,
 ) -> FunctionHistory:
     """
     Analyze the git history of a specific function.
@@ -47,6 +74,10 @@ def analyze_function_history(
         repo_path: Path to the git repository
         file_path: Path to the source file (relative to repo root)
         func_name: Name of the function to track
+        jobs: Number of worker processes for the commit walk (default: CPU count)
+        use_cache: Reuse a result cached on disk for the same HEAD commit
+        since: Only consider commits after this time
+        max_commits: Only consider this many of the most recent commits
 
     Returns:
         FunctionHistory with all changes to the function
@@ -58,122 +89,219 @@ def analyze_function_history(
     if not language:
         raise ValueError(f"Could not detect language for file: {file_path}")
 
+    # History only changes when HEAD moves
+    head_sha = get_head_sha(repo)
+    cache_key = None
+    if use_cache and head_sha is not None:
+        cache_key = history_cache_key(
+            "history",
+            repo.working_dir,
+            head_sha,
+            file_path,
+            func_name,
+            language,
+            since,
+            max_commits,
+        )
+        cached = load_cached_history(cache_key)
+        if isinstance(cached, FunctionHistory):
+            return cached
+
     # Get current state of the function
-    current_source = get_file_at_commit(repo, "HEAD", file_path)
+    current_blob = get_blob_at_commit(repo, "HEAD", file_path)
     current_info = None
-    if current_source:
-        current_info = find_function(current_source, func_name, language)
+    if current_blob is not None:
+        current_info = _find_function_in_blob(current_blob, func_name, language)
 
-    # Get all commits that touched this file
-    commits = get_file_commits(repo, file_path)
+    # Walk the history oldest to newest, then reverse to get newest first
+    changes = [
+        change
+        for change, _ in walk_function_changes(
+            repo,
+            repo_path,
+            file_path,
+            func_name,
+            language,
+            jobs,
+            since=since,
+            max_commits=max_commits,
+        )
+    ]
+    changes.reverse()
+
+    history = FunctionHistory(
+        function_name=func_name,
+        file_path=file_path,
+        repo_path=repo_path,
+        language=language,
+        changes=changes,
+        first_appeared=changes[-1].commit if changes else None,
+        last_modified=changes[0].commit if changes else None,
+        total_changes=len(changes),
+        current_info=current_info,
+    )
+    if cache_key is not None:
+        save_cached_history(cache_key, history)
+    return history
+
+
+def walk_function_changes(
+    repo: Repo,
+    repo_path: str,
+    file_path: str,
+    func_name: str,
+    language: str,
+    jobs: int | None = None,
+    since: datetime | None = None,
+    max_commits: int | None = None,
+) -> Iterator[tuple[FunctionChange, list[DiffHunk]]]:
+    """
+    Walk the commits that touched a file and classify changes to a function.
 
+    Yields (change, diff hunks of that commit) in chronological order (oldest
+    first), so callers that also need the diffs don't have to fetch them again.
+    """
+    # Get all commits that touched this file
+    commits = get_file_commits(repo, file_path, since, max_commits)
     if not commits:
-        return FunctionHistory(
-            function_name=func_name,
-            file_path=file_path,
-            repo_path=repo_path,
-            language=language,
-            changes=[],
-            first_appeared=None,
-            last_modified=None,
-            total_changes=0,
-            current_info=current_info,
-        )
+        return
 
     # Analyze each commit to see if it affected the function
-    changes: list[FunctionChange] = []
     prev_func_info: FunctionInfo | None = None
+    prev_blob: str | None = None  # File version at the last walked commit
+    blob_shas = get_file_blob_shas(repo, file_path, since, max_commits)
 
-    # Process commits from oldest to newest for accurate tracking
-    for commit in reversed(commits):
-        # Get file at this commit
-        source = get_file_at_commit(repo, commit.hash, file_path)
-        if source is None:
-            # File was deleted in this commit
-            if prev_func_info is not None:
-                changes.append(
-                    FunctionChange(
-                        commit=commit,
-                        function_info=None,
-                        change_type="deleted",
-                    )
+    # Diff hunks of each commit (oldest to newest) are independent of each
+    # other, so fetch them all up front - in parallel for long histories
+    ordered_commits = commits[::-1]
+    all_hunks = _get_all_diff_hunks(repo, repo_path, file_path, ordered_commits, jobs)
+
+    for commit, diff_hunks in zip(ordered_commits, all_hunks):
+        # The hunks are against the first parent, so they only say where the
+        # previous range moved if the file there is the version walked last
+        # (not so for branch commits in a merged history)
+        old_blob, new_blob = blob_shas.get(commit.hash, (None, None))
+        unchanged_since_prev = old_blob is not None and old_blob == prev_blob
+        prev_blob = new_blob
+        if prev_func_info is not None and unchanged_since_prev:
+            # Only re-parse when the diff touches the function's line range
+            shifted = shift_range_past_hunks(
+                diff_hunks, prev_func_info.start_line, prev_func_info.end_line
+            )
+            if shifted is not None:
+                # Untouched - just follow the lines it moved to
+                prev_func_info = replace(
+                    prev_func_info, start_line=shifted[0], end_line=shifted[1]
                 )
-                prev_func_info = None
-            continue
+                continue
 
-        # Find function in this version
-        func_info = find_function(source, func_name, language)
+        blob = get_blob_at_commit(repo, commit.hash, file_path)
+        func_info = None
+        if blob is not None:
+            func_info = _find_function_in_blob(blob, func_name, language)
 
         if func_info is None:
-            # Function doesn't exist at this commit
+            # File or function doesn't exist at this commit
             if prev_func_info is not None:
                 # Function was deleted
-                changes.append(
+                yield (
                     FunctionChange(
                         commit=commit,
                         function_info=None,
                         change_type="deleted",
-                    )
+                    ),
+                    diff_hunks,
                 )
                 prev_func_info = None
             continue
 
         if prev_func_info is None:
             # Function was created
-            changes.append(
+            yield (
                 FunctionChange(
                     commit=commit,
                     function_info=func_info,
                     change_type="created",
-                )
+                ),
+                diff_hunks,
             )
-            prev_func_info = func_info
-        else:
-            # Function exists - check if this commit modified it
-            diff_hunks = get_diff_hunks(repo, commit.hash, file_path)
-            if _diff_touches_function(diff_hunks, func_info):
-                changes.append(
-                    FunctionChange(
-                        commit=commit,
-                        function_info=func_info,
-                        change_type="modified",
-                    )
-                )
-            prev_func_info = func_info
+        elif _diff_touches_function(diff_hunks, func_info):
+            # Function exists and this commit modified it
+            yield (
+                FunctionChange(
+                    commit=commit,
+                    function_info=func_info,
+                    change_type="modified",
+                ),
+                diff_hunks,
+            )
+        prev_func_info = func_info
 
-    # Reverse to get newest first
-    changes.reverse()
 
-    return FunctionHistory(
-        function_name=func_name,
-        file_path=file_path,
-        repo_path=repo_path,
-        language=language,
-        changes=changes,
-        first_appeared=changes[-1].commit if changes else None,
-        last_modified=changes[0].commit if changes else None,
-        total_changes=len(changes),
-        current_info=current_info,
-    )
+def _get_all_diff_hunks(
+    repo: Repo,
+    repo_path: str,
+    file_path: str,
+    commits: list[CommitInfo],
+    jobs: int | None,
+) -> list[list[DiffHunk]]:
+    """
+    Get the diff hunks for the file in each commit, in parallel when worthwhile.
 
+    Results are returned in the same order as commits.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(commits) < PARALLEL_MIN_COMMITS:
+        return [get_diff_hunks(repo, commit.hash, file_path) for commit in commits]
+
+    worker = partial(_diff_hunks_in_worker, repo_path, file_path)
+    chunksize = max(1, min(32, len(commits) // jobs))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(worker, commits, chunksize=chunksize))
 
-def _diff_touches_function(hunks: list[DiffHunk], func_info: FunctionInfo) -> bool:
-    """Check if any diff hunk overlaps with the function's line range."""
-    for hunk in hunks:
-        # Check if hunk overlaps with function
-        # Hunk affects lines from new_start to new_start + new_count
-        hunk_start = hunk.new_start
-        hunk_end = hunk.new_start + hunk.new_count
 
-        func_start = func_info.start_line
-        func_end = func_info.end_line
+def _find_function_in_blob(
+    blob: Blob, func_name: str, language: str
+) -> FunctionInfo | None:
+    """find_function on a blob, memoized by blob SHA."""
+    key = (blob.hexsha, func_name, language)
+    if key in _find_cache:
+        return _find_cache[key]
 
-        if _ranges_overlap(hunk_start, hunk_end, func_start, func_end):
-            return True
+    source = read_blob(blob)
+    func_info = find_function(source, func_name, language) if source else None
 
-    return False
+    # Keep cache bounded - evict the oldest entry
+    if len(_find_cache) >= FIND_CACHE_SIZE:
+        del _find_cache[next(iter(_find_cache))]
+    _find_cache[key] = func_info
+    return func_info
 
 
-def _ranges_overlap(start1: int, end1: int, start2: int, end2: int) -> bool:
-    """Check if two line ranges overlap."""
-    return start1 <= end2 and start2 <= end1
+@cache
+def _worker_repo(repo_path: str) -> Repo:
+    """
+    Open the repository once per worker process.
+
+    Not via get_repo: a forked worker would get the parent's cached Repo,
+    whose persistent `git cat-file` pipes all the workers would then share.
+    """
+    return Repo(repo_path)
+
+
+def _diff_hunks_in_worker(
+    repo_path: str, file_path: str, commit: CommitInfo
+) -> list[DiffHunk]:
+    """Process-pool entry point for get_diff_hunks."""
+    return get_diff_hunks(_worker_repo(repo_path), commit.hash, file_path)
+
+
+def _diff_touches_function(hunks: list[DiffHunk], func_info: FunctionInfo) -> bool:
+    """Check if any diff hunk overlaps with the function's line range."""
+    # Hunk affects lines from new_start to new_start + new_count
+    func_start = func_info.start_line
+    func_end = func_info.end_line
+    return any(
+        hunk.new_start <= func_end and func_start <= hunk.new_start + hunk.new_count
+        for hunk in hunks
+    )
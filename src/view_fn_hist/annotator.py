@@ -2,15 +2,18 @@
 
 from dataclasses import dataclass
 
+from .analyzer import walk_function_changes
+from .cache import history_cache_key, load_cached_history, save_cached_history
 from .git_ops import (
     CommitInfo,
     LineChange,
     get_blame_for_range,
-    get_line_history_from_commits,
+    get_file_at_commit,
+    get_head_sha,
     get_repo,
+    iter_line_changes,
 )
 from .parser import detect_language, find_function
-from .analyzer import analyze_function_history
 
 
 @dataclass
@@ -25,7 +28,12 @@ class AnnotatedLine:
 
 @dataclass
 class AnnotatedFunction:
-    """A function with per-line history annotations."""
+    """
+    A function with per-line history annotations.
+
+    Per-line data is kept in parallel lists indexed by position in the
+    function; AnnotatedLine views are built on demand by indexing.
+    """
 
     function_name: str
     file_path: str
@@ -33,13 +41,41 @@ class AnnotatedFunction:
     language: str | None
     start_line: int
     end_line: int
-    lines: list[AnnotatedLine]
+    line_numbers: list[int]
+    contents: list[str]
+    blame_commits: list[CommitInfo]
+    # Diff history by line number, only for lines that have any
+    histories: dict[int, list[LineChange]]
     total_commits: int  # Total unique commits that touched this function
     created_at: CommitInfo | None  # First commit that introduced the function
 
+    def __len__(self) -> int:
+        return len(self.line_numbers)
+
+    def __getitem__(self, index: int) -> AnnotatedLine:
+        ln = self.line_numbers[index]
+        content = self.contents[index]
+        blame_commit = self.blame_commits[index]
+
+        # If no changes found from diff analysis, use blame commit
+        history = self.histories.get(ln) or [
+            LineChange(commit=blame_commit, content=content)
+        ]
+        return AnnotatedLine(
+            line_number=ln,
+            content=content,
+            history=history,
+            blame_commit=blame_commit,
+        )
+
+    @property
+    def lines(self) -> list[AnnotatedLine]:
+        """All lines as AnnotatedLine objects."""
+        return [self[i] for i in range(len(self))]
+
 
 def annotate_function(
-    repo_path: str, file_path: str, func_name: str
+    repo_path: str, file_path: str, func_name: str, use_cache: bool = True
 ) -> AnnotatedFunction:
     """
     Create an annotated view of a function with full per-line history.
@@ -48,6 +84,7 @@ def annotate_function(
         repo_path: Path to the git repository
         file_path: Path to the source file (relative to repo root)
         func_name: Name of the function to annotate
+        use_cache: Reuse a result cached on disk for the same HEAD commit
 
     Returns:
         AnnotatedFunction with per-line history
@@ -59,9 +96,18 @@ def annotate_function(
     if not language:
         raise ValueError(f"Could not detect language for file: {file_path}")
 
-    # Get current function info
-    from .git_ops import get_file_at_commit
+    # Annotations only change when HEAD moves
+    head_sha = get_head_sha(repo)
+    cache_key = None
+    if use_cache and head_sha is not None:
+        cache_key = history_cache_key(
+            "annotate", repo.working_dir, head_sha, file_path, func_name, language
+        )
+        cached = load_cached_history(cache_key)
+        if isinstance(cached, AnnotatedFunction):
+            return cached
 
+    # Get current function info
     current_source = get_file_at_commit(repo, "HEAD", file_path)
     if not current_source:
         raise ValueError(f"File not found: {file_path}")
@@ -70,60 +116,73 @@ def annotate_function(
     if not func_info:
         raise ValueError(f"Function not found: {func_name}")
 
-    # Get function history to find all commits that touched it
-    history = analyze_function_history(repo_path, file_path, func_name)
+    # Walk the function history once, keeping each commit's diff hunks
+    # so the per-line history below doesn't fetch them again
+    func_commits = []
+    diff_hunks = {}
+    for change, hunks in walk_function_changes(
+        repo, repo_path, file_path, func_name, language
+    ):
+        func_commits.append(change.commit)
+        diff_hunks[change.commit.hash] = hunks
+
+    # Newest first, like FunctionHistory.changes
+    func_commits.reverse()
 
     # Get blame info for the function's line range
     blame_lines = get_blame_for_range(
         repo, file_path, func_info.start_line, func_info.end_line
     )
 
-    # Get commits that touched this function
-    func_commits = [change.commit for change in history.changes]
-
-    # Get per-line history from diff analysis
-    line_history = get_line_history_from_commits(
-        repo, file_path, func_commits, func_info.start_line, func_info.end_line
-    )
-
-    # Build annotated lines
-    annotated_lines = []
+    # Get per-line history from diff analysis, filled in as changes stream in
+    line_history: dict[int, list[LineChange]] = {}
+    for ln, change in iter_line_changes(
+        repo,
+        file_path,
+        func_commits,
+        func_info.start_line,
+        func_info.end_line,
+        diff_hunks=diff_hunks,
+    ):
+        line_history.setdefault(ln, []).append(change)
+
+    # Build the per-line columns
+    line_numbers = []
+    contents = []
+    blame_commits = []
     source_lines = current_source.split("\n")
 
+    # Collect unique commits
+    all_commits = set()
+
     for blame_line in blame_lines:
         ln = blame_line.line_number
         content = source_lines[ln - 1] if ln <= len(source_lines) else ""
 
-        # Get the full history for this line (already in chronological order)
-        changes_for_line = line_history.get(ln, [])
+        line_numbers.append(ln)
+        contents.append(content)
+        blame_commits.append(blame_line.commit)
 
-        # If no changes found from diff analysis, use blame commit
-        if not changes_for_line:
-            changes_for_line = [LineChange(commit=blame_line.commit, content=content)]
-
-        annotated_lines.append(
-            AnnotatedLine(
-                line_number=ln,
-                content=content,
-                history=changes_for_line,
-                blame_commit=blame_line.commit,
-            )
-        )
-
-    # Collect unique commits
-    all_commits = set()
-    for line in annotated_lines:
-        for change in line.history:
-            all_commits.add(change.commit.hash)
+        # Get the full history for this line (already in chronological order)
+        if ln in line_history:
+            all_commits.update(change.commit.hash for change in line_history[ln])
+        else:
+            all_commits.add(blame_line.commit.hash)
 
-    return AnnotatedFunction(
+    annotated = AnnotatedFunction(
         function_name=func_name,
         file_path=file_path,
         repo_path=repo_path,
         language=language,
         start_line=func_info.start_line,
         end_line=func_info.end_line,
-        lines=annotated_lines,
+        line_numbers=line_numbers,
+        contents=contents,
+        blame_commits=blame_commits,
+        histories=line_history,
         total_commits=len(all_commits),
-        created_at=history.first_appeared,
+        created_at=func_commits[-1] if func_commits else None,
     )
+    if cache_key is not None:
+        save_cached_history(cache_key, annotated)
+    return annotated
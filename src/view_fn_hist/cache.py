@@ -0,0 +1,216 @@
+"""On-disk caches under ~/.cache/view-fn-hist."""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # Optional faster JSON (pip install gitmemory[fast])
+    orjson = None
+
+CACHE_DIR = Path.home() / ".cache" / "view-fn-hist"
+HISTORY_CACHE_DIR = CACHE_DIR / "history"
+CONTENT_CACHE_DIR = CACHE_DIR / "content"
+ENTITY_CACHE_FILE = CACHE_DIR / "entities.sqlite"
+PROBE_CACHE_FILE = CACHE_DIR / "llm_probe.json"
+PROBE_TTL_SECONDS = 24 * 60 * 60
+
+# Bump when the cached dataclasses change shape, so old pickles are ignored
+HISTORY_CACHE_VERSION = 2
+
+# Bump when entity detection changes, so old results are ignored
+ENTITY_CACHE_VERSION = 1
+
+# Entity cache rows kept; the least recently written are pruned beyond this
+ENTITY_CACHE_MAX_ROWS = 50_000
+
+
+def json_dumps(value: object) -> bytes:
+    """Serialize a value to JSON bytes, with orjson when it's installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            pass  # e.g. lone surrogates, which json escapes
+    return json.dumps(value).encode()
+
+
+def json_loads(data: bytes | str) -> object:
+    """Parse JSON, with orjson when it's installed."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. escaped lone surrogates, which json accepts
+    return json.loads(data)
+
+
+def history_cache_key(*parts: object) -> str:
+    """Build a cache key from the parts identifying a result."""
+    key_str = "\0".join(str(part) for part in (HISTORY_CACHE_VERSION, *parts))
+    return hashlib.sha1(key_str.encode()).hexdigest()
+
+
+def load_cached_history(key: str) -> object | None:
+    """Load a cached result, or None if missing or unreadable."""
+    cache_file = HISTORY_CACHE_DIR / f"{key}.pickle"
+    try:
+        with cache_file.open("rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+def save_cached_history(key: str, value: object):
+    """Save a result to the cache."""
+    try:
+        HISTORY_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file first so readers never see a partial pickle
+        fd, tmp_path = tempfile.mkstemp(dir=HISTORY_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=5)
+        os.replace(tmp_path, HISTORY_CACHE_DIR / f"{key}.pickle")
+    except OSError:
+        pass  # Ignore cache write failures
+
+
+def clear_history_cache():
+    """Remove all cached results."""
+    shutil.rmtree(HISTORY_CACHE_DIR, ignore_errors=True)
+
+
+def content_cache_key(*parts: str) -> str:
+    """Build a cache key for file content that can never change, e.g. at a SHA."""
+    return hashlib.sha1("\0".join(parts).encode()).hexdigest()
+
+
+def load_cached_content(key: str) -> str | None:
+    """Load cached file content, or None if missing or unreadable."""
+    try:
+        with (CONTENT_CACHE_DIR / key).open(encoding="utf-8", newline="") as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def save_cached_content(key: str, content: str):
+    """Save file content to the cache."""
+    try:
+        CONTENT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file first so readers never see partial content
+        fd, tmp_path = tempfile.mkstemp(dir=CONTENT_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        os.replace(tmp_path, CONTENT_CACHE_DIR / key)
+    except OSError:
+        pass  # Ignore cache write failures
+
+
+def entity_cache_key(language: str, source: bytes) -> bytes:
+    """Build a cache key for the entities found in a source file."""
+    key = hashlib.blake2b(
+        f"{ENTITY_CACHE_VERSION}\0{language}\0".encode(), digest_size=16
+    )
+    key.update(source)
+    return key.digest()
+
+
+def load_cached_entities(key: bytes) -> list | None:
+    """Load cached entity rows, or None if missing or unreadable."""
+    db = _entity_cache_db()
+    if db is None:
+        return None
+    try:
+        row = db.execute(
+            "SELECT entities FROM entities WHERE key = ?", (key,)
+        ).fetchone()
+    except sqlite3.Error:
+        return None
+    return json_loads(row[0]) if row else None
+
+
+def save_cached_entities(key: bytes, entities: list):
+    """Save entity rows (JSON-serializable tuples) to the cache."""
+    db = _entity_cache_db()
+    if db is None:
+        return
+    try:
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO entities VALUES (?, ?)",
+                (key, json_dumps(entities)),
+            )
+            # Replaced rows get a new rowid, so rowids follow write order
+            db.execute(
+                "DELETE FROM entities"
+                " WHERE rowid <= (SELECT MAX(rowid) FROM entities) - ?",
+                (ENTITY_CACHE_MAX_ROWS,),
+            )
+    except sqlite3.Error:
+        pass  # Ignore cache write failures
+
+
+# SQLite connections can't be shared between threads, so each opens its own.
+# Nor can they cross a fork, so forked workers open their own too.
+_entity_db = threading.local()
+
+
+def _entity_cache_db() -> sqlite3.Connection | None:
+    """Get this thread's entity cache connection, or None if it can't be opened."""
+    db = getattr(_entity_db, "connection", None)
+    if getattr(_entity_db, "pid", None) != os.getpid():
+        db = None  # Opened by the parent process
+    if db is None:
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(ENTITY_CACHE_FILE)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entities"
+                " (key BLOB PRIMARY KEY, entities BLOB NOT NULL)"
+            )
+        except (OSError, sqlite3.Error):
+            db = False  # Don't retry on every lookup
+        _entity_db.connection = db
+        _entity_db.pid = os.getpid()
+    return db or None
+
+
+def _probe_fingerprint(model: str, api_key: str | None) -> str:
+    """Short, non-reversible fingerprint of a model/API key pair."""
+    return hashlib.sha256(f"{model}|{api_key or ''}".encode()).hexdigest()[:16]
+
+
+def _load_probe_results() -> dict[str, float]:
+    """Load the fingerprint -> last successful test time map."""
+    try:
+        data = json.loads(PROBE_CACHE_FILE.read_text())
+    except (json.JSONDecodeError, OSError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def is_probe_cached(model: str, api_key: str | None) -> bool:
+    """Check if this model/key pair passed an LLM connection test recently."""
+    tested_at = _load_probe_results().get(_probe_fingerprint(model, api_key), 0)
+    return tested_at > time.time() - PROBE_TTL_SECONDS
+
+
+def save_probe_result(model: str, api_key: str | None):
+    """Record a successful LLM connection test for this model/key pair."""
+    results = _load_probe_results()
+    results[_probe_fingerprint(model, api_key)] = time.time()
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        PROBE_CACHE_FILE.write_text(json.dumps(results))
+    except OSError:
+        pass  # Ignore cache write failures
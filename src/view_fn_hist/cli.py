@@ -1,47 +1,164 @@
 """CLI entry point for view-fn-hist."""
 
-import argparse
-import difflib
 import os
 import sys
+from datetime import datetime
 from pathlib import Path
-
-from dotenv import load_dotenv
-
-# Load .env file before other imports that may need env vars
-load_dotenv()
-
-from .parser import detect_language
-from .providers import GitProvider, GitHubProvider
-from .providers.github_provider import parse_github_url
-from .summarizer import DEFAULT_MODEL, build_prompt, is_cached
-
-
-def compute_changed_lines(old_source: str | None, new_source: str) -> set[int]:
+from types import SimpleNamespace
+
+# Everything else (parsers, providers, litellm, textual) is imported only in
+# the code paths that need it, so --help and argument errors stay instant
+
+
+USAGE = """\
+usage: view-fn-hist [--web] [-t TYPE] <source> [file] <entity>
+
+  GitHub:    view-fn-hist <github-file-url> <entity>
+  Local git: view-fn-hist <repo> <file> <entity>
+  Batch:     view-fn-hist --batch <repo> < queries.txt
+  Web UI:    view-fn-hist --web
+
+  Entity type is auto-detected. Use -t to override."""
+
+HELP = f"""\
+{USAGE}
+
+View the git history of a specific function, class, struct, or other code entity.
+
+positional arguments:
+  args                  GitHub: <url> <func> | Local: <repo> <file> <func>
+
+options:
+  -h, --help            show this help message and exit
+  -d, --debug           Show debug info including LLM prompt
+  --web                 Start the web server instead of TUI
+  --port PORT           Port for web server (default: 8000)
+  -t TYPE, --type TYPE  Entity type to track (default: auto-detect)
+                        one of: auto, function, class, struct, enum, impl, interface
+  --plain               Output plain text instead of TUI (for scripting/Claude Code)
+  --no-summary          Skip LLM summary generation (useful when Claude will analyze the output)
+  --recheck-llm         Re-test the LLM connection even if it passed recently
+  --since DATE          Only consider commits after this date (YYYY-MM-DD or ISO 8601)
+  --max-commits N       Only consider the N most recent commits that touched the file
+  --batch               Read '<file> <entity>' lines from stdin and print plain output for each
+  --clear-cache         Delete cached history results first (on its own, just clear them)
+  --no-cache            Recompute the history instead of reusing a cached result"""
+
+ENTITY_TYPES = ("auto", "function", "class", "struct", "enum", "impl", "interface")
+
+# Command-line flags, mapped to the attribute they set to True
+FLAG_OPTIONS = {
+    "-d": "debug",
+    "--debug": "debug",
+    "--web": "web",
+    "--plain": "plain",
+    "--no-summary": "no_summary",
+    "--recheck-llm": "recheck_llm",
+    "--batch": "batch",
+    "--clear-cache": "clear_cache",
+    "--no-cache": "no_cache",
+}
+
+# Command-line options that take a value, mapped to their attribute
+VALUE_OPTIONS = {
+    "--port": "port",
+    "-t": "type",
+    "--type": "type",
+    "--since": "since",
+    "--max-commits": "max_commits",
+}
+
+
+def parse_argv(argv: list[str]) -> SimpleNamespace:
     """
-    Compute which lines in new_source are different from old_source.
+    Parse command-line arguments.
 
-    Returns set of 0-indexed line numbers that changed.
+    A single pass over argv instead of argparse, so startup (and --help in
+    particular) doesn't pay for building a parser. Errors are reported like
+    argparse: usage and message on stderr, exit status 2.
     """
-    if old_source is None:
-        # All lines are new
-        return set(range(len(new_source.split("\n"))))
+    parsed = SimpleNamespace(
+        args=[],
+        debug=False,
+        web=False,
+        port=8000,
+        type="auto",
+        plain=False,
+        no_summary=False,
+        recheck_llm=False,
+        since=None,
+        max_commits=None,
+        batch=False,
+        clear_cache=False,
+        no_cache=False,
+    )
+
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        i += 1
+
+        if arg in ("-h", "--help"):
+            print(HELP)
+            sys.exit(0)
+        if arg == "--":
+            # Everything after -- is positional
+            parsed.args.extend(argv[i:])
+            break
+        if arg in FLAG_OPTIONS:
+            setattr(parsed, FLAG_OPTIONS[arg], True)
+            continue
+
+        # Value options: "--opt value" or "--opt=value"
+        if arg in VALUE_OPTIONS:
+            if i >= len(argv):
+                _usage_error(f"argument {arg}: expected one argument")
+            name, value = arg, argv[i]
+            i += 1
+        elif arg.startswith("--") and arg.partition("=")[0] in VALUE_OPTIONS:
+            name, _, value = arg.partition("=")
+        elif arg.startswith("-") and arg != "-":
+            _usage_error(f"unrecognized arguments: {arg}")
+        else:
+            parsed.args.append(arg)
+            continue
 
-    old_lines = old_source.split("\n")
-    new_lines = new_source.split("\n")
+        attr = VALUE_OPTIONS[name]
+        setattr(parsed, attr, _convert_option(name, attr, value))
 
-    changed = set()
+    return parsed
 
-    # Use SequenceMatcher to find differences
-    matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
 
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-        if tag in ("replace", "insert"):
-            # Lines j1 to j2 in new are changed/added
-            for j in range(j1, j2):
-                changed.add(j)
+def _convert_option(name: str, attr: str, value: str):
+    """Convert and validate an option's value."""
+    if attr in ("port", "max_commits"):
+        try:
+            return int(value)
+        except ValueError:
+            _usage_error(f"argument {name}: invalid int value: {value!r}")
+    if attr == "type":
+        if value not in ENTITY_TYPES:
+            choices = ", ".join(repr(t) for t in ENTITY_TYPES)
+            _usage_error(
+                f"argument -t/--type: invalid choice: {value!r} (choose from {choices})"
+            )
+        return value
+    if attr == "since":
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            _usage_error(
+                f"argument --since: invalid date: {value!r} "
+                "(expected YYYY-MM-DD or ISO 8601)"
+            )
+    return value
+
 
-    return changed
+def _usage_error(message: str):
+    """Report a command-line error the way argparse does, and exit."""
+    print(USAGE, file=sys.stderr)
+    print(f"view-fn-hist: error: {message}", file=sys.stderr)
+    sys.exit(2)
 
 
 def is_github_url(source: str) -> bool:
@@ -49,67 +166,68 @@ def is_github_url(source: str) -> bool:
     return source.startswith("https://github.com") or source.startswith("github.com")
 
 
-def print_llm_status():
-    """Print LLM configuration status before TUI starts."""
-    import litellm
+def check_llm_status(recheck: bool = False) -> list[str]:
+    """
+    Check the LLM configuration and test the connection.
+
+    Returns the status lines to print, so the check can run on a background
+    thread while history is fetched. The connection test is skipped if the
+    same model and key passed it recently, unless recheck is set.
+    """
+    from .cache import is_probe_cached, save_probe_result
+    from .summarizer import DEFAULT_MODEL, api_key_env_var, load_litellm
 
     model = os.environ.get("VIEW_FN_HIST_MODEL", DEFAULT_MODEL)
-    print(f"LLM Model: {model}")
+    lines = [f"LLM Model: {model}"]
 
     # Check for API key based on model prefix
+    key = None
     key_status = []
     warnings = []
 
-    if model.startswith("openrouter/"):
-        key = os.environ.get("OPENROUTER_API_KEY")
-        if key:
-            key_status.append("OPENROUTER_API_KEY: configured")
-        else:
-            warnings.append("OPENROUTER_API_KEY not set - summary will be skipped")
-    elif model.startswith("gemini/"):
-        key = os.environ.get("GEMINI_API_KEY")
-        if key:
-            key_status.append("GEMINI_API_KEY: configured")
-        else:
-            warnings.append("GEMINI_API_KEY not set - summary will be skipped")
-    elif model.startswith("gpt-") or model.startswith("openai/"):
-        key = os.environ.get("OPENAI_API_KEY")
-        if key:
-            key_status.append("OPENAI_API_KEY: configured")
-        else:
-            warnings.append("OPENAI_API_KEY not set - summary will be skipped")
-    elif model.startswith("claude-") or model.startswith("anthropic/"):
-        key = os.environ.get("ANTHROPIC_API_KEY")
-        if key:
-            key_status.append("ANTHROPIC_API_KEY: configured")
-        else:
-            warnings.append("ANTHROPIC_API_KEY not set - summary will be skipped")
-    else:
+    env_var = api_key_env_var(model)
+    if env_var is None:
         # Generic check - litellm might figure it out
         key_status.append("API key: unknown provider, litellm will attempt connection")
+    else:
+        key = os.environ.get(env_var)
+        if key:
+            key_status.append(f"{env_var}: configured")
+        else:
+            warnings.append(f"{env_var} not set - summary will be skipped")
 
     for status in key_status:
-        print(f"  {status}")
+        lines.append(f"  {status}")
 
     for warning in warnings:
-        print(f"  Warning: {warning}")
+        lines.append(f"  Warning: {warning}")
 
     # Test LLM connection
-    if not warnings:
-        print("  Testing LLM connection...", end=" ", flush=True)
+    if not warnings and not recheck and is_probe_cached(model, key):
+        lines.append("  LLM connection: OK (cached)")
+    elif not warnings:
         try:
-            litellm.completion(
+            # Only pay for importing litellm when a test is actually needed
+            load_litellm().completion(
                 model=model,
                 messages=[{"role": "user", "content": "Say 'ok'"}],
                 max_tokens=10,
             )
-            print("OK")
+            save_probe_result(model, key)
+            lines.append("  Testing LLM connection... OK")
         except Exception:
-            print("FAILED")
-            print(
+            lines.append("  Testing LLM connection... FAILED")
+            lines.append(
                 "  Warning: LLM connection test failed - summary may not be available"
             )
 
+    return lines
+
+
+def print_llm_status(status_lines: list[str]):
+    """Print LLM configuration status before TUI starts."""
+    for line in status_lines:
+        print(line)
     print()
 
 
@@ -121,6 +239,8 @@ def print_plain_output(
     skip_summary: bool = False,
 ):
     """Print entity evolution as plain ASCII text for scripting/Claude Code."""
+    from .diff import compute_changed_lines
+
     print(f"# {entity_type.capitalize()}: {entity_name}")
     print(f"# File: {file_path}")
     print(f"# Versions: {len(snapshots)}")
@@ -164,57 +284,104 @@ def print_plain_output(
         print()
 
 
+def resolve_repo(repo_arg: str) -> tuple[Path, bool, bool]:
+    """Resolve a repository argument to (path, exists, is a git repo)."""
+    repo_path = Path(repo_arg).resolve()
+    if not repo_path.exists():
+        return repo_path, False, False
+    return repo_path, True, (repo_path / ".git").exists()
+
+
+def check_local_repo(repo_arg: str) -> Path:
+    """Resolve a local repository argument, exiting with an error if invalid."""
+    repo_path, exists, is_git = resolve_repo(repo_arg)
+    if not exists:
+        print(f"Error: Repository path does not exist: {repo_path}", file=sys.stderr)
+        sys.exit(1)
+    if not is_git:
+        print(f"Error: Not a git repository: {repo_path}", file=sys.stderr)
+        sys.exit(1)
+    return repo_path
+
+
+def run_batch(
+    repo_path: Path,
+    entity_type: str,
+    skip_summary: bool = False,
+    since: datetime | None = None,
+    max_commits: int | None = None,
+    use_cache: bool = True,
+):
+    """
+    Answer '<file> <entity>' queries read from stdin, one per line.
+
+    All queries share one provider, so startup and opening the repository
+    are paid once. A failing query is reported on stderr and the rest still
+    run.
+    """
+    from .parser import detect_language
+    from .providers.git_provider import GitProvider
+
+    provider = GitProvider(str(repo_path))
+
+    for line in sys.stdin:
+        parts = line.split()
+        if not parts:
+            continue
+        if len(parts) != 2:
+            print(
+                f"Error: Expected '<file> <entity>', got: {line.strip()}",
+                file=sys.stderr,
+            )
+            continue
+
+        file_path, func_name = parts
+        language = detect_language(file_path)
+        if not language:
+            print(f"Error: Unsupported file type: {file_path}", file=sys.stderr)
+            continue
+
+        try:
+            detected_type, snapshots = provider.get_function_evolution(
+                file_path,
+                func_name,
+                language,
+                entity_type,
+                since,
+                max_commits,
+                use_cache=use_cache,
+            )
+        except Exception:
+            print(
+                f"Error: Failed to analyze git history of {file_path}", file=sys.stderr
+            )
+            continue
+
+        if not snapshots:
+            print(f"Error: No history found for '{func_name}'", file=sys.stderr)
+            continue
+
+        print_plain_output(
+            func_name, file_path, snapshots, detected_type, skip_summary=skip_summary
+        )
+
+
 def main():
     """Main entry point for view-fn-hist CLI."""
-    parser = argparse.ArgumentParser(
-        description="View the git history of a specific function, class, struct, or other code entity.",
-        usage="view-fn-hist [--web] [-t TYPE] <source> [file] <entity>\n\n"
-        "  GitHub:    view-fn-hist <github-file-url> <entity>\n"
-        "  Local git: view-fn-hist <repo> <file> <entity>\n"
-        "  Web UI:    view-fn-hist --web\n\n"
-        "  Entity type is auto-detected. Use -t to override.",
-    )
-    parser.add_argument(
-        "args",
-        nargs="*",
-        help="GitHub: <url> <func> | Local: <repo> <file> <func>",
-    )
-    parser.add_argument(
-        "-d",
-        "--debug",
-        action="store_true",
-        help="Show debug info including LLM prompt",
-    )
-    parser.add_argument(
-        "--web",
-        action="store_true",
-        help="Start the web server instead of TUI",
-    )
-    parser.add_argument(
-        "--port",
-        type=int,
-        default=8000,
-        help="Port for web server (default: 8000)",
-    )
-    parser.add_argument(
-        "-t",
-        "--type",
-        choices=["auto", "function", "class", "struct", "enum", "impl", "interface"],
-        default="auto",
-        help="Entity type to track (default: auto-detect)",
-    )
-    parser.add_argument(
-        "--plain",
-        action="store_true",
-        help="Output plain text instead of TUI (for scripting/Claude Code)",
-    )
-    parser.add_argument(
-        "--no-summary",
-        action="store_true",
-        help="Skip LLM summary generation (useful when Claude will analyze the output)",
-    )
+    parsed = parse_argv(sys.argv[1:])
+
+    # Load .env file before anything reads API keys or tokens
+    from dotenv import load_dotenv
 
-    parsed = parser.parse_args()
+    load_dotenv()
+
+    if parsed.clear_cache:
+        from .cache import clear_history_cache
+
+        clear_history_cache()
+        print("Cleared cached history results")
+        if not parsed.args and not parsed.web:
+            return
 
     # Web server mode
     if parsed.web:
@@ -229,159 +396,205 @@ def main():
     positional = parsed.args
 
     if not positional:
-        parser.print_help()
+        print(HELP)
         sys.exit(1)
 
-    # Determine if source is GitHub URL or local path
-    if is_github_url(positional[0]):
-        # GitHub URL - expect: <url> <func>
-        if len(positional) < 2:
-            print(
-                "Error: GitHub usage: view-fn-hist <github-url> <func>", file=sys.stderr
-            )
-            sys.exit(1)
-
-        github_url = positional[0]
-        func_name = positional[1]
-
-        # Parse URL to extract file path
-        try:
-            owner, repo_name, branch, file_path = parse_github_url(github_url)
-        except ValueError:
-            print("Error: Invalid GitHub URL format", file=sys.stderr)
-            print(
-                "Expected: https://github.com/owner/repo/blob/branch/path/to/file",
-                file=sys.stderr,
-            )
-            sys.exit(1)
-
-        if not file_path:
-            print("Error: GitHub URL must include file path", file=sys.stderr)
-            print(
-                "Example: https://github.com/owner/repo/blob/main/src/file.rs",
-                file=sys.stderr,
-            )
-            sys.exit(1)
-
-        print(f"Source: GitHub ({owner}/{repo_name})")
-        print(f"File: {file_path}")
+    # Batch mode - many queries against one local repository
+    if parsed.batch:
+        repo_path = check_local_repo(positional[0])
+        run_batch(
+            repo_path,
+            parsed.type,
+            skip_summary=parsed.no_summary,
+            since=parsed.since,
+            max_commits=parsed.max_commits,
+            use_cache=not parsed.no_cache,
+        )
+        return
 
-        try:
-            provider = GitHubProvider(github_url)
-        except Exception:
-            print("Error: Failed to connect to GitHub repository", file=sys.stderr)
-            print("Check that the repository exists and is accessible", file=sys.stderr)
-            sys.exit(1)
-    else:
-        # Local git repository - expect: <repo> <file> <func>
-        if len(positional) < 3:
-            print(
-                "Error: Local git usage: view-fn-hist <repo> <file> <func>",
-                file=sys.stderr,
-            )
-            sys.exit(1)
+    from concurrent.futures import ThreadPoolExecutor
 
-        repo_path = Path(positional[0]).resolve()
-        file_path = positional[1]
-        func_name = positional[2]
+    from .parser import detect_language
 
-        if not repo_path.exists():
-            print(
-                f"Error: Repository path does not exist: {repo_path}", file=sys.stderr
-            )
-            sys.exit(1)
+    # Network-bound setup (GitHub connection, LLM test) runs in the background
+    # while local checks and history analysis proceed
+    executor = ThreadPoolExecutor(max_workers=2)
+    try:
+        provider_future = None
 
-        git_dir = repo_path / ".git"
-        if not git_dir.exists():
-            print(f"Error: Not a git repository: {repo_path}", file=sys.stderr)
-            sys.exit(1)
+        # Determine if source is GitHub URL or local path
+        if is_github_url(positional[0]):
+            # GitHub URL - expect: <url> <func>
+            if len(positional) < 2:
+                print(
+                    "Error: GitHub usage: view-fn-hist <github-url> <func>",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
 
-        print(f"Source: Local git ({repo_path})")
+            from .providers.github_provider import GitHubProvider, parse_github_url
 
-        # Normalize file path to be relative to repo root
-        file_path_input = Path(file_path)
+            github_url = positional[0]
+            func_name = positional[1]
 
-        # If it's an absolute path or starts with .., resolve it
-        if file_path_input.is_absolute() or file_path.startswith(".."):
-            file_path_resolved = file_path_input.resolve()
-            # Check if it's inside the repo and make it relative
+            # Parse URL to extract file path
             try:
-                file_path = str(file_path_resolved.relative_to(repo_path))
+                owner, repo_name, branch, file_path = parse_github_url(github_url)
             except ValueError:
+                print("Error: Invalid GitHub URL format", file=sys.stderr)
                 print(
-                    f"Error: File {file_path_resolved} is not inside repository {repo_path}",
+                    "Expected: https://github.com/owner/repo/blob/branch/path/to/file",
                     file=sys.stderr,
                 )
                 sys.exit(1)
 
-        full_file_path = repo_path / file_path
-        if not full_file_path.exists():
-            print(f"Error: File does not exist: {full_file_path}", file=sys.stderr)
-            sys.exit(1)
+            if not file_path:
+                print("Error: GitHub URL must include file path", file=sys.stderr)
+                print(
+                    "Example: https://github.com/owner/repo/blob/main/src/file.rs",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
 
-        provider = GitProvider(str(repo_path))
+            # Connect while the language check below runs
+            provider_future = executor.submit(GitHubProvider, github_url)
 
-    # Check language support
-    language = detect_language(file_path)
-    if not language:
-        print(f"Error: Unsupported file type: {file_path}", file=sys.stderr)
-        print(
-            "Supported extensions: .py, .js, .ts, .go, .rs, .java, .c, .cpp, .rb, etc.",
-            file=sys.stderr,
-        )
-        sys.exit(1)
+            print(f"Source: GitHub ({owner}/{repo_name})")
+            print(f"File: {file_path}")
+        else:
+            # Local git repository - expect: <repo> <file> <func>
+            if len(positional) < 3:
+                print(
+                    "Error: Local git usage: view-fn-hist <repo> <file> <func>",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
 
-    # Get entity evolution
-    entity_type = parsed.type
-    if entity_type == "auto":
-        print(f"Searching for '{func_name}' in {file_path}...")
-    else:
-        print(f"Analyzing {entity_type} '{func_name}' in {file_path}...")
-    try:
-        entity_type, snapshots = provider.get_function_evolution(
-            file_path, func_name, language, entity_type
-        )
-    except Exception:
-        print("Error: Failed to analyze git history", file=sys.stderr)
-        print("Check that the file exists and has git history", file=sys.stderr)
-        sys.exit(1)
+            repo_path = check_local_repo(positional[0])
+            file_path = positional[1]
+            func_name = positional[2]
+
+            print(f"Source: Local git ({repo_path})")
+
+            # Normalize file path to be relative to repo root
+            file_path_input = Path(file_path)
+
+            # If it's an absolute path or starts with .., resolve it
+            if file_path_input.is_absolute() or file_path.startswith(".."):
+                file_path_resolved = file_path_input.resolve()
+                # Check if it's inside the repo and make it relative
+                try:
+                    file_path = str(file_path_resolved.relative_to(repo_path))
+                except ValueError:
+                    print(
+                        f"Error: File {file_path_resolved} is not inside repository {repo_path}",
+                        file=sys.stderr,
+                    )
+                    sys.exit(1)
+
+            full_file_path = repo_path / file_path
+            if not full_file_path.exists():
+                print(f"Error: File does not exist: {full_file_path}", file=sys.stderr)
+                sys.exit(1)
 
-    if not snapshots:
-        print(f"Error: No history found for '{func_name}'", file=sys.stderr)
-        sys.exit(1)
+            from .providers.git_provider import GitProvider
 
-    print(f"Found {entity_type} with {len(snapshots)} versions")
-    print()
+            provider = GitProvider(str(repo_path))
 
-    # Plain text output mode (for scripting/Claude Code)
-    if parsed.plain:
-        print_plain_output(
-            func_name, file_path, snapshots, entity_type, skip_summary=parsed.no_summary
-        )
-        return
+        # Check language support
+        language = detect_language(file_path)
+        if not language:
+            print(f"Error: Unsupported file type: {file_path}", file=sys.stderr)
+            print(
+                "Supported extensions: .py, .js, .ts, .go, .rs, .java, .c, .cpp, .rb, etc.",
+                file=sys.stderr,
+            )
+            sys.exit(1)
 
-    # Print LLM status before launching TUI
-    print_llm_status()
+        # Test the LLM connection while GitHub connects and history is fetched
+        # (TUI only)
+        llm_status_future = None
+        if not parsed.plain:
+            llm_status_future = executor.submit(check_llm_status, parsed.recheck_llm)
 
-    # In debug mode, show the prompt before TUI starts
-    if parsed.debug:
-        if is_cached(func_name, file_path, snapshots, entity_type):
-            print("Summary is cached - no LLM call needed")
+        if provider_future is not None:
+            try:
+                provider = provider_future.result()
+            except Exception:
+                print("Error: Failed to connect to GitHub repository", file=sys.stderr)
+                print(
+                    "Check that the repository exists and is accessible",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+
+        # Get entity evolution
+        entity_type = parsed.type
+        if entity_type == "auto":
+            print(f"Searching for '{func_name}' in {file_path}...")
         else:
-            print("=" * 60)
-            print("LLM PROMPT:")
-            print("=" * 60)
-            print(build_prompt(func_name, file_path, snapshots, entity_type))
-            print("=" * 60)
+            print(f"Analyzing {entity_type} '{func_name}' in {file_path}...")
+        try:
+            entity_type, snapshots = provider.get_function_evolution(
+                file_path,
+                func_name,
+                language,
+                entity_type,
+                since=parsed.since,
+                max_commits=parsed.max_commits,
+                use_cache=not parsed.no_cache,
+            )
+        except Exception:
+            print("Error: Failed to analyze git history", file=sys.stderr)
+            print("Check that the file exists and has git history", file=sys.stderr)
+            sys.exit(1)
+
+        if not snapshots:
+            print(f"Error: No history found for '{func_name}'", file=sys.stderr)
+            sys.exit(1)
+
+        print(f"Found {entity_type} with {len(snapshots)} versions")
         print()
-        input("Press Enter to start TUI...")
 
-    # Launch TUI (lazy import to avoid requiring textual for --plain mode)
-    from .tui import run_tui
+        # Plain text output mode (for scripting/Claude Code)
+        if parsed.plain:
+            print_plain_output(
+                func_name,
+                file_path,
+                snapshots,
+                entity_type,
+                skip_summary=parsed.no_summary,
+            )
+            return
+
+        # Print LLM status before launching TUI
+        print_llm_status(llm_status_future.result())
+
+        # In debug mode, show the prompt before TUI starts
+        if parsed.debug:
+            from .summarizer import build_prompt, is_cached
+
+            if is_cached(func_name, file_path, snapshots, entity_type):
+                print("Summary is cached - no LLM call needed")
+            else:
+                print("=" * 60)
+                print("LLM PROMPT:")
+                print("=" * 60)
+                print(build_prompt(func_name, file_path, snapshots, entity_type))
+                print("=" * 60)
+            print()
+            input("Press Enter to start TUI...")
 
-    run_tui(
-        func_name, file_path, snapshots, debug=parsed.debug, entity_type=entity_type
-    )
+        # Launch TUI (lazy import to avoid requiring textual for --plain mode)
+        from .tui import run_tui
+
+        run_tui(
+            func_name, file_path, snapshots, debug=parsed.debug, entity_type=entity_type
+        )
+
+    finally:
+        # Don't leave the background work holding up exit on early returns
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+"""Line diffing between entity snapshots."""
+
+import difflib
+
+try:
+    from rapidfuzz.distance import Levenshtein
+except ImportError:  # Optional C-accelerated diff (pip install gitmemory[fast])
+    Levenshtein = None
+
+
+def compute_changed_lines(old_source: str | None, new_source: str) -> set[int]:
+    """
+    Compute which lines in new_source are different from old_source.
+
+    Returns set of 0-indexed line numbers that changed.
+    """
+    if old_source is None:
+        # All lines are new
+        return set(range(len(new_source.split("\n"))))
+    if old_source == new_source:
+        return set()
+
+    old_lines = old_source.split("\n")
+    new_lines = new_source.split("\n")
+
+    # Lines shared at the start and end are unchanged, so only diff the
+    # middle. Most edits are small, so this leaves little to compare.
+    start = 0
+    limit = min(len(old_lines), len(new_lines))
+    while start < limit and old_lines[start] == new_lines[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old_lines[-1 - end] == new_lines[-1 - end]:
+        end += 1
+
+    changed = set()
+
+    for tag, i1, i2, j1, j2 in _line_opcodes(
+        old_lines[start : len(old_lines) - end],
+        new_lines[start : len(new_lines) - end],
+    ):
+        if tag in ("replace", "insert"):
+            # Lines j1 to j2 in new are changed/added
+            changed.update(range(start + j1, start + j2))
+
+    return changed
+
+
+def _line_opcodes(old_lines: list[str], new_lines: list[str]):
+    """Get difflib-style opcodes between two lists of lines."""
+    if Levenshtein is not None:
+        return Levenshtein.opcodes(old_lines, new_lines)
+
+    # Pure-Python fallback
+    return difflib.SequenceMatcher(None, old_lines, new_lines).get_opcodes()
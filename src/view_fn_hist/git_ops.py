@@ -1,10 +1,23 @@
 """Git operations for extracting file and commit history."""
 
+import os
+import re
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 
-from git import Repo
+from git import NULL_TREE, Blob, Commit, GitCommandError, Repo
+
+# Below this many file versions, worker start-up costs more than parsing
+PARALLEL_MIN_VERSIONS = 16
+
+# Unified diff hunk header; a count of 1 may be omitted
+_HUNK_RE = re.compile(r"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# Marks the start of each commit in `git log -p` output
+_COMMIT_MARKER = "__COMMIT__ "
 
 
 @dataclass
@@ -31,53 +44,138 @@ class CommitInfo:
     subject: str  # First line of message
 
 
+# Open repositories, keyed by resolved path. Bounded (oldest first out)
+# since the web server is long-lived.
+REPO_CACHE_SIZE = 8
+_repos: dict[Path, Repo] = {}
+
+# CommitInfo by commit hash; commits are immutable, so entries never go stale
+COMMIT_INFO_CACHE_SIZE = 10_000
+_commit_infos: dict[str, CommitInfo] = {}
+
+
 def get_repo(repo_path: str) -> Repo:
-    """Open a git repository."""
+    """
+    Open a git repository.
+
+    Repos are cached per path, so every caller shares one object database
+    and its persistent `git cat-file` process for blob reads.
+    """
     path = Path(repo_path).resolve()
     if not path.exists():
         raise ValueError(f"Repository path does not exist: {path}")
-    return Repo(path)
+    repo = _repos.get(path)
+    if repo is None:
+        if len(_repos) >= REPO_CACHE_SIZE:
+            del _repos[next(iter(_repos))]
+        repo = _repos[path] = Repo(path)
+    return repo
+
+
+def get_head_sha(repo: Repo) -> str | None:
+    """Get the SHA of HEAD, or None for an empty repository."""
+    try:
+        return repo.head.commit.hexsha
+    except ValueError:
+        return None
 
 
-def get_file_commits(repo: Repo, file_path: str) -> list[CommitInfo]:
+def get_file_commits(
+    repo: Repo,
+    file_path: str,
+    since: datetime | None = None,
+    max_commits: int | None = None,
+) -> list[CommitInfo]:
     """
     Get all commits that touched a specific file.
 
+    since and max_commits bound the walk to recent history; git stops
+    walking once it passes them.
     Returns commits in reverse chronological order (newest first).
     Note: Does not track renames in this version.
     """
-    commits = []
+    return list(
+        iter_file_commits(repo, file_path, since=since, max_commits=max_commits)
+    )
+
+
+def iter_file_commits(
+    repo: Repo,
+    file_path: str,
+    reverse: bool = False,
+    since: datetime | None = None,
+    max_commits: int | None = None,
+) -> Iterator[CommitInfo]:
+    """
+    Yield the commits that touched a specific file, as git walks them.
 
+    Newest first, or oldest first if reverse is set.
+    """
     # Use GitPython's iter_commits with paths filter
-    for commit in repo.iter_commits(paths=file_path):
-        commits.append(
-            CommitInfo(
-                hash=commit.hexsha,
-                short_hash=commit.hexsha[:7],
-                author_name=commit.author.name or "Unknown",
-                author_email=commit.author.email or "",
-                timestamp=datetime.fromtimestamp(commit.committed_date),
-                message=commit.message,
-                subject=commit.message.split("\n")[0].strip(),
-            )
+    log_options = {}
+    if reverse:
+        log_options["reverse"] = True
+    if since is not None:
+        log_options["since"] = since.isoformat()
+    if max_commits is not None:
+        log_options["max_count"] = max_commits
+
+    for commit in repo.iter_commits(paths=file_path, **log_options):
+        yield _commit_info(commit)
+
+
+def _commit_info(commit: Commit) -> CommitInfo:
+    """Build (or reuse) the CommitInfo for a GitPython commit."""
+    info = _commit_infos.get(commit.hexsha)
+    if info is None:
+        message = commit.message
+        info = CommitInfo(
+            hash=commit.hexsha,
+            short_hash=commit.hexsha[:7],
+            author_name=commit.author.name or "Unknown",
+            author_email=commit.author.email or "",
+            timestamp=datetime.fromtimestamp(commit.committed_date),
+            message=message,
+            subject=message.partition("\n")[0].strip(),
         )
-
-    return commits
+        if len(_commit_infos) >= COMMIT_INFO_CACHE_SIZE:
+            del _commit_infos[next(iter(_commit_infos))]
+        _commit_infos[commit.hexsha] = info
+    return info
 
 
 def get_file_at_commit(repo: Repo, commit_hash: str, file_path: str) -> str | None:
     """
     Get file contents at a specific commit.
 
+    Returns None if the file doesn't exist at that commit.
+    """
+    blob = get_blob_at_commit(repo, commit_hash, file_path)
+    if blob is None:
+        return None
+    return read_blob(blob)
+
+
+def get_blob_at_commit(repo: Repo, commit_hash: str, file_path: str) -> Blob | None:
+    """
+    Get the blob for a file at a specific commit, without reading its contents.
+
+    The blob's hexsha identifies the file version, so callers can skip
+    re-reading and re-parsing versions they have already seen.
     Returns None if the file doesn't exist at that commit.
     """
     try:
         commit = repo.commit(commit_hash)
-        blob = commit.tree / file_path
-        return blob.data_stream.read().decode("utf-8")
+        return commit.tree / file_path
     except KeyError:
         # File doesn't exist at this commit
         return None
+
+
+def read_blob(blob: Blob) -> str | None:
+    """Read a blob's contents as text. Returns None for binary files."""
+    try:
+        return blob.data_stream.read().decode("utf-8")
     except UnicodeDecodeError:
         # Binary file
         return None
@@ -97,7 +195,7 @@ def get_diff_hunks(repo: Repo, commit_hash: str, file_path: str) -> list[DiffHun
         diffs = parent.diff(commit, paths=file_path, create_patch=True)
     else:
         # Initial commit - diff against empty tree
-        diffs = commit.diff(None, paths=file_path, create_patch=True, R=True)
+        diffs = commit.diff(NULL_TREE, paths=file_path, create_patch=True)
 
     hunks = []
     for diff in diffs:
@@ -107,6 +205,115 @@ def get_diff_hunks(repo: Repo, commit_hash: str, file_path: str) -> list[DiffHun
     return hunks
 
 
+def iter_commit_diffs(
+    repo: Repo,
+    file_path: str,
+    since: datetime | None = None,
+    max_commits: int | None = None,
+) -> Iterator[tuple[str, list[DiffHunk]]]:
+    """
+    Yield (commit hash, hunks) for every commit that touched a file.
+
+    Oldest first. All diffs come from one `git log -p` process instead of a
+    diff per commit; merges are diffed against their first parent.
+    since/max_commits limit the walk the same way as in iter_file_commits.
+    """
+    log_args = [
+        "--reverse",
+        f"--format={_COMMIT_MARKER}%H",
+        "-p",
+        "--no-color",
+        "--no-ext-diff",
+        "--no-renames",
+        "--diff-merges=first-parent",
+    ]
+    if since is not None:
+        log_args.append(f"--since={since.isoformat()}")
+    if max_commits is not None:
+        log_args.append(f"--max-count={max_commits}")
+
+    proc = repo.git.log(*log_args, "--", file_path, as_process=True)
+    sha = None
+    lines: list[str] = []
+    for raw in proc.stdout:
+        line = raw.decode("utf-8", errors="replace")
+        if line.startswith(_COMMIT_MARKER):
+            if sha is not None:
+                yield sha, _parse_diff_hunks("".join(lines))
+            sha = line[len(_COMMIT_MARKER) :].rstrip("\n")
+            lines = []
+        else:
+            lines.append(line)
+
+    if sha is not None:
+        yield sha, _parse_diff_hunks("".join(lines))
+
+
+def get_file_blob_shas(
+    repo: Repo,
+    file_path: str,
+    since: datetime | None = None,
+    max_commits: int | None = None,
+) -> dict[str, tuple[str | None, str | None]]:
+    """
+    Map each commit that touched a file to the file's blob hashes around it.
+
+    Returns (blob at the first parent, blob at the commit) per commit. One
+    `git log --raw` lists every version, so callers can read blobs directly
+    instead of walking each commit's tree. A hash is None where the file
+    doesn't exist on that side.
+    """
+    log_args = [
+        f"--format={_COMMIT_MARKER}%H",
+        "--raw",
+        "--no-abbrev",
+        "--no-renames",
+        "--diff-merges=first-parent",
+    ]
+    if since is not None:
+        log_args.append(f"--since={since.isoformat()}")
+    if max_commits is not None:
+        log_args.append(f"--max-count={max_commits}")
+
+    blob_shas: dict[str, tuple[str | None, str | None]] = {}
+    sha = None
+    for line in repo.git.log(*log_args, "--", file_path).splitlines():
+        if line.startswith(_COMMIT_MARKER):
+            sha = line[len(_COMMIT_MARKER) :]
+        elif line.startswith(":") and sha is not None:
+            # :<old mode> <new mode> <old blob> <new blob> <status>\t<path>
+            old_blob, new_blob = line.split("\t", 1)[0].split(" ")[2:4]
+            blob_shas[sha] = (
+                old_blob if old_blob.strip("0") else None,
+                new_blob if new_blob.strip("0") else None,
+            )
+
+    return blob_shas
+
+
+def shift_range_past_hunks(
+    hunks: list[DiffHunk], start_line: int, end_line: int
+) -> tuple[int, int] | None:
+    """
+    Map a line range through a diff that doesn't touch it.
+
+    start_line/end_line are in the old (parent) file's coordinates. Returns the
+    same range in the new file's coordinates, or None if any hunk overlaps it.
+    """
+    offset = 0
+    for hunk in hunks:
+        hunk_start = hunk.old_start
+        hunk_end = hunk.old_start + hunk.old_count
+
+        if hunk_start <= end_line and start_line <= hunk_end:
+            return None
+        if hunk_end < start_line:
+            # Hunk is above the range - lines shift by its net size
+            offset += hunk.new_count - hunk.old_count
+
+    return start_line + offset, end_line + offset
+
+
 def _parse_diff_hunks(diff_text: str) -> list[DiffHunk]:
     """Parse unified diff text into DiffHunk objects."""
     hunks = []
@@ -122,22 +329,18 @@ def _parse_diff_hunks(diff_text: str) -> list[DiffHunk]:
                 hunk_lines = []
 
             # Parse hunk header: @@ -old_start,old_count +new_start,new_count @@
-            try:
-                parts = line.split("@@")[1].strip()
-                old_part, new_part = parts.split(" ")
-
-                old_start, old_count = _parse_hunk_range(old_part[1:])  # Remove -
-                new_start, new_count = _parse_hunk_range(new_part[1:])  # Remove +
-
-                current_hunk = DiffHunk(
-                    old_start=old_start,
-                    old_count=old_count,
-                    new_start=new_start,
-                    new_count=new_count,
-                    content="",
-                )
-            except (ValueError, IndexError):
+            match = _HUNK_RE.match(line)
+            if match is None:
                 continue
+
+            old_start, old_count, new_start, new_count = match.groups()
+            current_hunk = DiffHunk(
+                old_start=int(old_start),
+                old_count=int(old_count) if old_count is not None else 1,
+                new_start=int(new_start),
+                new_count=int(new_count) if new_count is not None else 1,
+                content="",
+            )
         elif current_hunk is not None:
             hunk_lines.append(line)
 
@@ -149,15 +352,6 @@ def _parse_diff_hunks(diff_text: str) -> list[DiffHunk]:
     return hunks
 
 
-def _parse_hunk_range(range_str: str) -> tuple[int, int]:
-    """Parse a hunk range like '10,5' or '10' into (start, count)."""
-    if "," in range_str:
-        start, count = range_str.split(",")
-        return int(start), int(count)
-    else:
-        return int(range_str), 1
-
-
 @dataclass
 class LineChange:
     """A single change to a line, with content."""
@@ -175,48 +369,94 @@ class BlameLine:
     commit: CommitInfo
 
 
+# Blame results keyed by (repo dir, HEAD sha, file, start, end)
+BLAME_CACHE_SIZE = 256
+_blame_cache: dict[tuple[str, str, str, int, int], list[BlameLine]] = {}
+
+
 def get_blame_for_range(
     repo: Repo, file_path: str, start_line: int, end_line: int
 ) -> list[BlameLine]:
     """
     Get blame information for a range of lines.
 
+    Runs a single `git blame --porcelain -L start,end` for the range, and
+    caches the result per HEAD commit so adjacent lookups in the same file
+    don't re-run git.
     Returns list of BlameLine with commit info for each line.
     """
+    head_sha = get_head_sha(repo)
+    if head_sha is None:
+        return []
+
+    # git refuses ranges that run past the end of the file, so stop at the
+    # last line like a full blame would
+    blob = get_blob_at_commit(repo, head_sha, file_path)
+    if blob is None:
+        return []
+    data = blob.data_stream.read()
+    line_count = data.count(b"\n") + (bool(data) and not data.endswith(b"\n"))
+    start_line = max(start_line, 1)
+    end_line = min(end_line, line_count)
+    if start_line > end_line:
+        return []
+
+    key = (repo.working_dir, head_sha, file_path, start_line, end_line)
+    if key in _blame_cache:
+        return list(_blame_cache[key])
+
     blame_lines = []
+    commit_infos: dict[str, CommitInfo] = {}
 
-    # GitPython's blame returns [(commit, [lines]), ...]
     try:
-        blame_data = repo.blame("HEAD", file_path)
-    except Exception:
-        return blame_lines
-
-    current_line = 1
-    for commit, lines in blame_data:
-        for line_content in lines:
-            if start_line <= current_line <= end_line:
-                blame_lines.append(
-                    BlameLine(
-                        line_number=current_line,
-                        content=line_content,
-                        commit=CommitInfo(
-                            hash=commit.hexsha,
-                            short_hash=commit.hexsha[:7],
-                            author_name=commit.author.name or "Unknown",
-                            author_email=commit.author.email or "",
-                            timestamp=datetime.fromtimestamp(commit.committed_date),
-                            message=commit.message,
-                            subject=commit.message.split("\n")[0].strip(),
-                        ),
-                    )
+        proc = repo.git.blame(
+            "--porcelain",
+            f"-L{start_line},{end_line}",
+            head_sha,
+            "--",
+            file_path,
+            as_process=True,
+        )
+        for sha, line_number, content in _iter_porcelain_blame(proc.stdout):
+            if sha not in commit_infos:
+                commit_infos[sha] = _commit_info(repo.commit(sha))
+            blame_lines.append(
+                BlameLine(
+                    line_number=line_number,
+                    content=content,
+                    commit=commit_infos[sha],
                 )
-            current_line += 1
-            if current_line > end_line:
-                break
-        if current_line > end_line:
-            break
+            )
+        proc.wait()
+    except GitCommandError:
+        return []
 
-    return blame_lines
+    if len(_blame_cache) >= BLAME_CACHE_SIZE:
+        del _blame_cache[next(iter(_blame_cache))]
+    _blame_cache[key] = blame_lines
+    return list(blame_lines)
+
+
+def _iter_porcelain_blame(stream) -> Iterator[tuple[str, int, str]]:
+    """
+    Parse `git blame --porcelain` output as it is read.
+
+    Yields (commit sha, final line number, line content) for each line.
+    """
+    sha = ""
+    line_number = 0
+    for raw in stream:
+        line = raw.decode("utf-8", errors="replace").rstrip("\n")
+        if line.startswith("\t"):
+            # Line content follows the header and any commit metadata
+            yield sha, line_number, line[1:]
+            continue
+
+        # Header: <sha> <orig line> <final line> [<group size>]
+        parts = line.split(" ")
+        if len(parts) >= 3 and len(parts[0]) >= 40:
+            sha = parts[0]
+            line_number = int(parts[2])
 
 
 def get_line_history_from_commits(
@@ -225,21 +465,54 @@ def get_line_history_from_commits(
     func_commits: list[CommitInfo],
     start_line: int,
     end_line: int,
+    diff_hunks: dict[str, list[DiffHunk]] | None = None,
 ) -> dict[int, list[LineChange]]:
     """
     Get the history of changes for each line in a range, with content.
 
     For each line, returns the list of changes (oldest first / chronological).
     Each change includes the commit and the line content at that point.
+    diff_hunks optionally maps commit hashes to hunks the caller already has.
     """
-    # Map: line_number -> list of changes
-    line_history: dict[int, list[LineChange]] = {
-        ln: [] for ln in range(start_line, end_line + 1)
-    }
+    # Index by offset from start_line; the dict is only built once at the end
+    history: list[list[LineChange]] = [[] for _ in range(end_line - start_line + 1)]
+    for line_num, change in iter_line_changes(
+        repo, file_path, func_commits, start_line, end_line, diff_hunks
+    ):
+        history[line_num - start_line].append(change)
+
+    return {start_line + i: changes for i, changes in enumerate(history)}
+
+
+def iter_line_changes(
+    repo: Repo,
+    file_path: str,
+    func_commits: list[CommitInfo],
+    start_line: int,
+    end_line: int,
+    diff_hunks: dict[str, list[DiffHunk]] | None = None,
+) -> Iterator[tuple[int, LineChange]]:
+    """
+    Stream the changes to each line in a range as (line_number, LineChange).
+
+    Changes are yielded commit by commit in chronological order. Diffs the
+    caller doesn't pass in are read from a single `git log -p` run.
+    """
+    diff_hunks = dict(diff_hunks or {})
+    missing = {c.hash for c in func_commits} - diff_hunks.keys()
+    if missing:
+        for sha, hunks in iter_commit_diffs(repo, file_path):
+            if sha in missing:
+                diff_hunks[sha] = hunks
+                missing.discard(sha)
+                if not missing:
+                    break
 
     # Process commits from oldest to newest (chronological order)
     for commit_info in reversed(func_commits):
-        hunks = get_diff_hunks(repo, commit_info.hash, file_path)
+        hunks = diff_hunks.get(commit_info.hash)
+        if hunks is None:
+            hunks = get_diff_hunks(repo, commit_info.hash, file_path)
 
         for hunk in hunks:
             # Extract the new lines from this hunk (lines that were added/modified)
@@ -250,11 +523,7 @@ def get_line_history_from_commits(
                 line_num = hunk.new_start + offset
                 if start_line <= line_num <= end_line:
                     # Record this change with its content
-                    line_history[line_num].append(
-                        LineChange(commit=commit_info, content=line_content)
-                    )
-
-    return line_history
+                    yield line_num, LineChange(commit=commit_info, content=line_content)
 
 
 def _extract_new_lines_from_hunk(hunk: DiffHunk) -> list[str]:
@@ -266,18 +535,14 @@ def _extract_new_lines_from_hunk(hunk: DiffHunk) -> list[str]:
     Removed lines (-) are excluded.
     """
     new_lines = []
+    # Split on "\n" only - source lines may contain other line breaks (\r)
     for line in hunk.content.split("\n"):
-        if line.startswith("-"):
-            # Removed line - skip it
-            continue
-        elif line.startswith("+"):
-            # Added line - include without the + prefix
+        # Dispatch on the one-character diff prefix: added (+) and context
+        # (space) lines are kept without it; removed lines (-), "\ No newline"
+        # markers and empty lines at the end of the hunk are skipped
+        prefix = line[:1]
+        if prefix == "+" or prefix == " ":
             new_lines.append(line[1:])
-        elif line.startswith(" ") or line == "":
-            # Context line - include without the space prefix
-            if line.startswith(" "):
-                new_lines.append(line[1:])
-            # Empty lines at end of hunk are ignored
     return new_lines
 
 
@@ -297,26 +562,55 @@ def get_function_evolution(
     file_path: str,
     func_name: str,
     language: str,
+    jobs: int | None = None,
 ) -> list[FunctionSnapshot]:
     """
     Get the function source at each commit that touched it.
 
+    Each distinct version of the file is read once, and the versions are
+    parsed across worker processes when there are enough of them.
     Returns snapshots in chronological order (oldest first).
     """
-    from .parser import find_function
+    from .parser import slice_lines
 
-    snapshots: list[FunctionSnapshot] = []
-    commits = get_file_commits(repo, file_path)
+    # Walk from oldest to newest, keeping the commits that changed the file
+    # contents, and read each distinct blob once (the repo isn't thread-safe)
+    versions: list[tuple[CommitInfo, bytes]] = []
+    sources: dict[bytes, str | None] = {}
+    prev_binsha: bytes | None = None
 
+    for commit_info in iter_file_commits(repo, file_path, reverse=True):
+        blob = get_blob_at_commit(repo, commit_info.hash, file_path)
+        if blob is None:
+            continue
+
+        # Same file contents as the last commit - nothing can have changed
+        if blob.binsha == prev_binsha:
+            continue
+        prev_binsha = blob.binsha
+
+        if blob.binsha not in sources:
+            sources[blob.binsha] = read_blob(blob)
+        versions.append((commit_info, blob.binsha))
+
+    # Parse every distinct text version
+    texts = {binsha: source for binsha, source in sources.items() if source}
+    func_infos = dict(
+        zip(
+            texts,
+            _find_function_in_sources(list(texts.values()), func_name, language, jobs),
+        )
+    )
+
+    snapshots: list[FunctionSnapshot] = []
     prev_source: str | None = None
 
-    # Process from oldest to newest
-    for commit_info in reversed(commits):
-        source = get_file_at_commit(repo, commit_info.hash, file_path)
+    for commit_info, binsha in versions:
+        source = sources[binsha]
         if source is None:
             continue
 
-        func_info = find_function(source, func_name, language)
+        func_info = func_infos.get(binsha)
         if func_info is None:
             # Function doesn't exist at this commit
             if prev_source is not None:
@@ -334,8 +628,7 @@ def get_function_evolution(
             continue
 
         # Extract function source
-        lines = source.split("\n")
-        func_source = "\n".join(lines[func_info.start_line - 1 : func_info.end_line])
+        func_source = slice_lines(source, func_info.start_line, func_info.end_line)
 
         if prev_source is None:
             # Function was created
@@ -363,3 +656,31 @@ def get_function_evolution(
             prev_source = func_source
 
     return snapshots
+
+
+def _find_function_in_sources(
+    sources: list[str], func_name: str, language: str, jobs: int | None
+) -> list:
+    """
+    Run find_function on each source, in parallel when worthwhile.
+
+    Results are returned in the same order as sources.
+    """
+    from .parser import prepare_finder
+
+    finder = prepare_finder(language, func_name)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(sources) < PARALLEL_MIN_VERSIONS:
+        return [finder(source) for source in sources]
+
+    # Keep neighbouring versions together, so each worker's parser can reuse
+    # its previous tree
+    chunksize = max(1, min(32, len(sources) // jobs))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(
+            executor.map(
+                finder,
+                sources,
+                chunksize=chunksize,
+            )
+        )
@@ -1,8 +1,12 @@
 """Source code parsing for function and entity detection."""
 
 import ast
+import re
+from collections import deque
+from collections.abc import Callable, Iterator
 from dataclasses import dataclass
-from pathlib import Path
+from functools import cache, lru_cache, partial
+from types import ModuleType
 
 
 @dataclass
@@ -34,11 +38,44 @@ EXTENSION_TO_LANGUAGE = {
     ".rb": "ruby",
 }
 
+# Function start patterns for the regex fallback, with the name filled in
+_NAMED_FUNCTION_PATTERNS = {
+    "javascript": r"(?:function\s+{name}\s*\(|(?:const|let|var)\s+{name}\s*=\s*(?:async\s*)?\(|{name}\s*\([^)]*\)\s*\{{)",
+    "typescript": r"(?:function\s+{name}\s*\(|(?:const|let|var)\s+{name}\s*=\s*(?:async\s*)?\(|{name}\s*\([^)]*\)\s*(?::\s*\w+)?\s*\{{)",
+    "go": r"func\s+(?:\([^)]+\)\s+)?{name}\s*\(",
+    "rust": r"fn\s+{name}\s*[<(]",
+    "java": r"(?:public|private|protected)?\s*(?:static)?\s*\w+\s+{name}\s*\(",
+    "c": r"^\s*\w+\s+{name}\s*\(",
+    "cpp": r"^\s*(?:\w+\s+)+{name}\s*\(",
+    "ruby": r"def\s+{name}\s*(?:\(|$)",
+}
+
+# Generic function patterns by language, capturing the name
+_ALL_FUNCTIONS_REGEXES = {
+    language: re.compile(pattern)
+    for language, pattern in {
+        "javascript": r"(?:function\s+(\w+)\s*\(|(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\()",
+        "typescript": r"(?:function\s+(\w+)\s*\(|(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\()",
+        "go": r"func\s+(?:\([^)]+\)\s+)?(\w+)\s*\(",
+        "rust": r"fn\s+(\w+)\s*[<(]",
+        "java": r"(?:public|private|protected)?\s*(?:static)?\s*\w+\s+(\w+)\s*\(",
+        "c": r"^\s*\w+\s+(\w+)\s*\(",
+        "cpp": r"^\s*(?:\w+\s+)+(\w+)\s*\(",
+        "ruby": r"def\s+(\w+)",
+    }.items()
+}
+
 
+@lru_cache(maxsize=1024)
 def detect_language(file_path: str) -> str | None:
     """Detect programming language from file extension."""
-    ext = Path(file_path).suffix.lower()
-    return EXTENSION_TO_LANGUAGE.get(ext)
+    # Same rules as os.path.splitext (leading dots aren't an extension), but
+    # cheaper since this runs for every file path we classify
+    name = file_path[file_path.rfind("/") + 1 :].lstrip(".")
+    dot = name.rfind(".")
+    if dot < 0:
+        return None
+    return EXTENSION_TO_LANGUAGE.get(name[dot:].lower())
 
 
 def find_entity_auto(
@@ -64,21 +101,24 @@ def find_entity_auto(
             return result
         return _find_python_function(source, entity_name)
 
+    # Tree-sitter names are slices of the source, so they must appear in it
+    if entity_name not in source:
+        return None
+
     # For other languages, use tree-sitter auto-detection
-    try:
-        from .ts_parser import find_entity_auto as ts_find_entity_auto
+    ts_parser = _ts_parser()
+    if ts_parser is None:
+        return None
 
-        result = ts_find_entity_auto(source, entity_name, language)
-        if result:
-            return FunctionInfo(
-                name=result.name,
-                start_line=result.start_line,
-                end_line=result.end_line,
-                signature=result.signature,
-                entity_type=result.entity_type,
-            )
-    except ImportError:
-        pass
+    result = ts_parser.find_entity_auto(source, entity_name, language)
+    if result:
+        return FunctionInfo(
+            name=result.name,
+            start_line=result.start_line,
+            end_line=result.end_line,
+            signature=result.signature,
+            entity_type=result.entity_type,
+        )
 
     return None
 
@@ -98,38 +138,79 @@ def find_entity(
     Returns:
         FunctionInfo with line numbers, or None if not found.
     """
+    return prepare_finder(language, entity_name, entity_type)(source)
+
+
+def prepare_finder(
+    language: str, entity_name: str, entity_type: str = "function"
+) -> Callable[[str], FunctionInfo | None]:
+    """
+    Resolve find_entity's language/type dispatch once.
+
+    Returns a callable taking just the source, for searching many versions of
+    a file. It can be pickled, so it can be sent to worker processes too.
+    """
     # Auto-detect entity type
     if entity_type == "auto":
-        return find_entity_auto(source, entity_name, language)
+        return partial(find_entity_auto, entity_name=entity_name, language=language)
 
     # For Python classes, use AST
     if language == "python" and entity_type == "class":
-        return _find_python_class(source, entity_name)
+        return partial(_find_python_class, class_name=entity_name)
 
     # For Python functions, use AST
     if language == "python" and entity_type == "function":
-        return _find_python_function(source, entity_name)
+        return partial(_find_python_function, func_name=entity_name)
 
     # For all other cases, use tree-sitter
-    try:
-        from .ts_parser import find_entity as ts_find_entity
+    return partial(
+        _find_ts_entity,
+        entity_name=entity_name,
+        entity_type=entity_type,
+        language=language,
+    )
 
-        result = ts_find_entity(source, entity_name, entity_type, language)
-        if result:
-            # Convert EntityInfo to FunctionInfo for backward compatibility
-            return FunctionInfo(
-                name=result.name,
-                start_line=result.start_line,
-                end_line=result.end_line,
-                signature=result.signature,
-                entity_type=result.entity_type,
-            )
-    except ImportError:
-        pass
+
+def _find_ts_entity(
+    source: str, entity_name: str, entity_type: str, language: str
+) -> FunctionInfo | None:
+    """Find an entity using tree-sitter, if it's available."""
+    if entity_name not in source:
+        return None
+
+    ts_parser = _ts_parser()
+    if ts_parser is None:
+        return None
+
+    result = ts_parser.find_entity(source, entity_name, entity_type, language)
+    if result:
+        # Convert EntityInfo to FunctionInfo for backward compatibility
+        return FunctionInfo(
+            name=result.name,
+            start_line=result.start_line,
+            end_line=result.end_line,
+            signature=result.signature,
+            entity_type=result.entity_type,
+        )
 
     return None
 
 
+@cache
+def _ts_parser() -> ModuleType | None:
+    """
+    Import the tree-sitter parser on first use, or None if it's unavailable.
+
+    Loading tree-sitter is slow, so it's kept out of module import; caching
+    the module skips the import machinery on every later lookup.
+    """
+    try:
+        from . import ts_parser
+    except ImportError:
+        return None
+    return ts_parser
+
+
 def find_function(source: str, func_name: str, language: str) -> FunctionInfo | None:
     """
     Find a function by name in source code.
@@ -147,29 +228,75 @@ def find_all_functions(source: str, language: str) -> list[FunctionInfo]:
         return _find_all_functions_regex(source, language)
 
 
-def _find_python_function(source: str, func_name: str) -> FunctionInfo | None:
-    """Find a Python function using the ast module."""
+def slice_lines(source: str, start_line: int, end_line: int) -> str:
+    """
+    Get lines start_line..end_line (1-indexed, inclusive) of source.
+
+    Same as joining a slice of source.split("\\n"), but finds the newlines
+    in place instead of building a list of every line in the file.
+    """
+    if end_line < start_line:
+        return ""
+
+    begin = 0
+    for _ in range(start_line - 1):
+        newline = source.find("\n", begin)
+        if newline < 0:
+            return ""
+        begin = newline + 1
+
+    stop = begin - 1
+    for _ in range(end_line - start_line + 1):
+        stop = source.find("\n", stop + 1)
+        if stop < 0:
+            return source[begin:]
+    return source[begin:stop]
+
+
+@lru_cache(maxsize=32)
+def _parse_python(source: str) -> ast.Module | None:
+    """
+    Parse Python source, or None if it has a syntax error.
+
+    Recent trees are cached, since looking up several entities (or entity
+    types) in the same version of a file would otherwise parse it each time.
+    Trees are shared between callers, so they must not be modified.
+    """
     try:
-        tree = ast.parse(source)
+        return ast.parse(source)
     except SyntaxError:
         return None
 
-    for node in ast.walk(tree):
-        if isinstance(node, ast.FunctionDef) and node.name == func_name:
-            return FunctionInfo(
-                name=node.name,
-                start_line=node.lineno,
-                end_line=node.end_lineno or node.lineno,
-                signature=_get_python_signature(node),
-                class_name=_get_class_name(tree, node),
-            )
-        elif isinstance(node, ast.AsyncFunctionDef) and node.name == func_name:
+
+def _may_define(source: str, name: str) -> bool:
+    """
+    Cheap check for whether Python source could define name, before parsing.
+
+    The parser NFKC-normalizes identifiers, so non-ASCII source can define a
+    name that doesn't appear in it verbatim.
+    """
+    return name in source or not source.isascii()
+
+
+def _find_python_function(source: str, func_name: str) -> FunctionInfo | None:
+    """Find a Python function using the ast module."""
+    if not _may_define(source, func_name):
+        return None
+
+    tree = _parse_python(source)
+    if tree is None:
+        return None
+
+    for node, class_name in _iter_python_functions(tree):
+        if node.name == func_name:
             return FunctionInfo(
                 name=node.name,
                 start_line=node.lineno,
                 end_line=node.end_lineno or node.lineno,
-                signature=_get_python_signature(node, is_async=True),
-                class_name=_get_class_name(tree, node),
+                signature=_get_python_signature(
+                    node, is_async=isinstance(node, ast.AsyncFunctionDef)
+                ),
+                class_name=class_name,
             )
 
     return None
@@ -177,9 +304,11 @@ def _find_python_function(source: str, func_name: str) -> FunctionInfo | None:
 
 def _find_python_class(source: str, class_name: str) -> FunctionInfo | None:
     """Find a Python class using the ast module."""
-    try:
-        tree = ast.parse(source)
-    except SyntaxError:
+    if not _may_define(source, class_name):
+        return None
+
+    tree = _parse_python(source)
+    if tree is None:
         return None
 
     for node in ast.walk(tree):
@@ -190,7 +319,7 @@ def _find_python_class(source: str, class_name: str) -> FunctionInfo | None:
                 if isinstance(base, ast.Name):
                     bases.append(base.id)
                 elif isinstance(base, ast.Attribute):
-                    bases.append(ast.unparse(base))
+                    bases.append(_expr_source(base))
 
             signature = f"class {node.name}"
             if bases:
@@ -210,24 +339,22 @@ def _find_python_class(source: str, class_name: str) -> FunctionInfo | None:
 
 def _find_all_python_functions(source: str) -> list[FunctionInfo]:
     """Find all Python functions using the ast module."""
-    try:
-        tree = ast.parse(source)
-    except SyntaxError:
+    tree = _parse_python(source)
+    if tree is None:
         return []
 
     functions = []
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            is_async = isinstance(node, ast.AsyncFunctionDef)
-            functions.append(
-                FunctionInfo(
-                    name=node.name,
-                    start_line=node.lineno,
-                    end_line=node.end_lineno or node.lineno,
-                    signature=_get_python_signature(node, is_async=is_async),
-                    class_name=_get_class_name(tree, node),
-                )
+    for node, class_name in _iter_python_functions(tree):
+        is_async = isinstance(node, ast.AsyncFunctionDef)
+        functions.append(
+            FunctionInfo(
+                name=node.name,
+                start_line=node.lineno,
+                end_line=node.end_lineno or node.lineno,
+                signature=_get_python_signature(node, is_async=is_async),
+                class_name=class_name,
             )
+        )
 
     return functions
 
@@ -240,7 +367,7 @@ def _get_python_signature(
     for arg in node.args.args:
         arg_str = arg.arg
         if arg.annotation:
-            arg_str += f": {ast.unparse(arg.annotation)}"
+            arg_str += f": {_expr_source(arg.annotation)}"
         args.append(arg_str)
 
     # Add *args and **kwargs
@@ -253,44 +380,92 @@ def _get_python_signature(
     return f"{prefix} {node.name}({', '.join(args)})"
 
 
-def _get_class_name(
-    tree: ast.Module, func_node: ast.FunctionDef | ast.AsyncFunctionDef
-) -> str | None:
-    """Get the class name if the function is a method."""
-    for node in ast.walk(tree):
-        if isinstance(node, ast.ClassDef):
-            for item in node.body:
-                if item is func_node:
-                    return node.name
+def _expr_source(node: ast.expr) -> str:
+    """
+    Get the source for an annotation or base class, as ast.unparse would.
+
+    Most are plain names like `int`, `list[str]` or `Foo | None`, which are
+    built directly; ast.unparse sets up a whole visitor for each one.
+    """
+    return _simple_expr_source(node) or ast.unparse(node)
+
+
+def _simple_expr_source(node: ast.expr) -> str | None:
+    """Source for simple names, attributes, subscripts and unions, else None."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Constant) and node.value is None:
+        return "None"
+    if isinstance(node, ast.Constant) and node.value is ...:
+        return "..."
+    if isinstance(node, ast.Attribute):
+        if not isinstance(node.value, (ast.Name, ast.Attribute)):
+            return None
+        value = _simple_expr_source(node.value)
+        return value and f"{value}.{node.attr}"
+    if isinstance(node, ast.Subscript):
+        if not isinstance(node.value, (ast.Name, ast.Attribute)):
+            return None
+        value = _simple_expr_source(node.value)
+        if isinstance(node.slice, ast.Tuple):
+            # Single-item and empty tuples need a trailing comma or parens
+            if len(node.slice.elts) < 2:
+                return None
+            items = [_simple_expr_source(elt) for elt in node.slice.elts]
+            index = None if None in items else ", ".join(items)
+        else:
+            index = _simple_expr_source(node.slice)
+        return value and index and f"{value}[{index}]"
+    if (
+        isinstance(node, ast.BinOp)
+        and isinstance(node.op, ast.BitOr)
+        and not isinstance(node.right, ast.BinOp)
+    ):
+        left = _simple_expr_source(node.left)
+        right = _simple_expr_source(node.right)
+        return left and right and f"{left} | {right}"
     return None
 
 
-def _find_function_regex(
-    source: str, func_name: str, language: str
-) -> FunctionInfo | None:
-    """Regex-based fallback for non-Python languages."""
-    import re
+def _iter_python_functions(
+    tree: ast.AST,
+) -> Iterator[tuple[ast.FunctionDef | ast.AsyncFunctionDef, str | None]]:
+    """
+    Yield (function node, class name) in ast.walk order.
 
-    lines = source.split("\n")
+    The class name is set for functions directly in a class body (methods),
+    so finding a method's class doesn't take another walk of the tree.
+    """
+    class_names: dict[int, str] = {}
+    todo: deque[ast.AST] = deque([tree])
+    while todo:
+        node = todo.popleft()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield node, class_names.get(id(node))
+        elif isinstance(node, ast.ClassDef):
+            for item in node.body:
+                class_names[id(item)] = node.name
+        todo.extend(ast.iter_child_nodes(node))
 
-    # Language-specific function patterns
-    patterns = {
-        "javascript": rf"(?:function\s+{func_name}\s*\(|(?:const|let|var)\s+{func_name}\s*=\s*(?:async\s*)?\(|{func_name}\s*\([^)]*\)\s*\{{)",
-        "typescript": rf"(?:function\s+{func_name}\s*\(|(?:const|let|var)\s+{func_name}\s*=\s*(?:async\s*)?\(|{func_name}\s*\([^)]*\)\s*(?::\s*\w+)?\s*\{{)",
-        "go": rf"func\s+(?:\([^)]+\)\s+)?{func_name}\s*\(",
-        "rust": rf"fn\s+{func_name}\s*[<(]",
-        "java": rf"(?:public|private|protected)?\s*(?:static)?\s*\w+\s+{func_name}\s*\(",
-        "c": rf"^\s*\w+\s+{func_name}\s*\(",
-        "cpp": rf"^\s*(?:\w+\s+)+{func_name}\s*\(",
-        "ruby": rf"def\s+{func_name}\s*(?:\(|$)",
-    }
-
-    pattern = patterns.get(language)
+
+@lru_cache(maxsize=128)
+def _named_function_regex(func_name: str, language: str) -> re.Pattern | None:
+    """Compile the function start pattern for a name, once per name."""
+    pattern = _NAMED_FUNCTION_PATTERNS.get(language)
     if not pattern:
         return None
+    return re.compile(pattern.format(name=func_name), re.MULTILINE)
+
 
-    regex = re.compile(pattern, re.MULTILINE)
+def _find_function_regex(
+    source: str, func_name: str, language: str
+) -> FunctionInfo | None:
+    """Regex-based fallback for non-Python languages."""
+    regex = _named_function_regex(func_name, language)
+    if regex is None:
+        return None
 
+    lines = source.split("\n")
     for i, line in enumerate(lines):
         if regex.search(line):
             # Found the function start, now find the end
@@ -308,29 +483,13 @@ def _find_function_regex(
 
 def _find_all_functions_regex(source: str, language: str) -> list[FunctionInfo]:
     """Regex-based fallback for finding all functions in non-Python languages."""
-    import re
-
-    lines = source.split("\n")
     functions = []
 
-    # Generic function patterns by language
-    patterns = {
-        "javascript": r"(?:function\s+(\w+)\s*\(|(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\()",
-        "typescript": r"(?:function\s+(\w+)\s*\(|(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\()",
-        "go": r"func\s+(?:\([^)]+\)\s+)?(\w+)\s*\(",
-        "rust": r"fn\s+(\w+)\s*[<(]",
-        "java": r"(?:public|private|protected)?\s*(?:static)?\s*\w+\s+(\w+)\s*\(",
-        "c": r"^\s*\w+\s+(\w+)\s*\(",
-        "cpp": r"^\s*(?:\w+\s+)+(\w+)\s*\(",
-        "ruby": r"def\s+(\w+)",
-    }
-
-    pattern = patterns.get(language)
-    if not pattern:
+    regex = _ALL_FUNCTIONS_REGEXES.get(language)
+    if regex is None:
         return functions
 
-    regex = re.compile(pattern)
-
+    lines = source.split("\n")
     for i, line in enumerate(lines):
         match = regex.search(line)
         if match:
@@ -371,13 +530,11 @@ def _find_function_end(lines: list[str], start: int, language: str) -> int:
         found_first_brace = False
 
         for i in range(start, len(lines)):
+            # Only the balance at the end of each line matters, so count in bulk
             line = lines[i]
-            for char in line:
-                if char == "{":
-                    brace_count += 1
-                    found_first_brace = True
-                elif char == "}":
-                    brace_count -= 1
+            opening = line.count("{")
+            brace_count += opening - line.count("}")
+            found_first_brace = found_first_brace or opening > 0
 
             if found_first_brace and brace_count == 0:
                 return i
@@ -1,7 +1,19 @@
 """Provider abstraction for git sources."""
 
 from .base import FunctionSnapshot, Provider
-from .git_provider import GitProvider
-from .github_provider import GitHubProvider
 
 __all__ = ["FunctionSnapshot", "Provider", "GitProvider", "GitHubProvider"]
+
+
+def __getattr__(name: str):
+    # Import providers on first use, so using one doesn't pay for the other's
+    # dependencies (GitPython vs PyGithub)
+    if name == "GitProvider":
+        from .git_provider import GitProvider
+
+        return GitProvider
+    if name == "GitHubProvider":
+        from .github_provider import GitHubProvider
+
+        return GitHubProvider
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -39,6 +39,9 @@ class Provider(ABC):
         func_name: str,
         language: str,
         entity_type: str = "function",
+        since: datetime | None = None,
+        max_commits: int | None = None,
+        use_cache: bool = True,
     ) -> tuple[str, list[FunctionSnapshot]]:
         """
         Get the entity source at each commit that touched it.
@@ -48,6 +51,9 @@ class Provider(ABC):
             func_name: Name of the entity to track
             language: Programming language
             entity_type: Type of entity ("function", "class", "struct", "enum", "impl", "auto")
+            since: Only consider commits after this time
+            max_commits: Only consider this many of the most recent commits
+            use_cache: Reuse a result cached on disk while the history is unchanged
 
         Returns:
             Tuple of (detected_entity_type, snapshots) where snapshots are in
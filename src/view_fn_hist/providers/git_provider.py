@@ -1,11 +1,24 @@
 """Local git repository provider."""
 
+from collections.abc import Iterator
 from datetime import datetime
 from pathlib import Path
 
 from git import Repo
 
-from ..parser import find_entity
+try:
+    import pygit2
+except ImportError:  # Optional libgit2 object reads (pip install gitmemory[fast])
+    pygit2 = None
+
+from ..cache import history_cache_key, load_cached_history, save_cached_history
+from ..git_ops import (
+    get_file_blob_shas,
+    get_head_sha,
+    iter_commit_diffs,
+    shift_range_past_hunks,
+)
+from ..parser import FunctionInfo, find_entity, prepare_finder, slice_lines
 from .base import CommitInfo, FunctionSnapshot, Provider
 
 
@@ -17,9 +30,14 @@ class GitProvider(Provider):
         if not self.repo_path.exists():
             raise ValueError(f"Repository path does not exist: {self.repo_path}")
         self.repo = Repo(self.repo_path)
+        # libgit2 reads objects in-process, rather than through `git cat-file`
+        self._objects = pygit2.Repository(str(self.repo_path)) if pygit2 else None
 
     def get_file_content(self, file_path: str, ref: str = "HEAD") -> str | None:
         """Get file content at a specific ref."""
+        if self._objects is not None:
+            return self._get_file_content_pygit2(file_path, ref)
+
         try:
             commit = self.repo.commit(ref)
             blob = commit.tree / file_path
@@ -27,22 +45,33 @@ class GitProvider(Provider):
         except (KeyError, UnicodeDecodeError):
             return None
 
-    def _get_file_commits(self, file_path: str) -> list[CommitInfo]:
-        """Get all commits that touched a specific file."""
-        commits = []
-        for commit in self.repo.iter_commits(paths=file_path):
-            commits.append(
-                CommitInfo(
-                    hash=commit.hexsha,
-                    short_hash=commit.hexsha[:7],
-                    author_name=commit.author.name or "Unknown",
-                    author_email=commit.author.email or "",
-                    timestamp=datetime.fromtimestamp(commit.committed_date),
-                    message=commit.message,
-                    subject=commit.message.split("\n")[0].strip(),
-                )
+    def _get_file_commits(
+        self,
+        file_path: str,
+        since: datetime | None = None,
+        max_commits: int | None = None,
+        reverse: bool = False,
+    ) -> Iterator[CommitInfo]:
+        """Yield the commits that touched a file, newest first unless reverse."""
+        log_options = {}
+        if since is not None:
+            log_options["since"] = since.isoformat()
+        if max_commits is not None:
+            log_options["max_count"] = max_commits
+
+        # git applies --reverse after --max-count, so this is still the newest N
+        for commit in self.repo.iter_commits(
+            paths=file_path, reverse=reverse, **log_options
+        ):
+            yield CommitInfo(
+                hash=commit.hexsha,
+                short_hash=commit.hexsha[:7],
+                author_name=commit.author.name or "Unknown",
+                author_email=commit.author.email or "",
+                timestamp=datetime.fromtimestamp(commit.committed_date),
+                message=commit.message,
+                subject=commit.message.partition("\n")[0].strip(),
             )
-        return commits
 
     def get_function_evolution(
         self,
@@ -50,10 +79,48 @@ class GitProvider(Provider):
         func_name: str,
         language: str,
         entity_type: str = "function",
+        since: datetime | None = None,
+        max_commits: int | None = None,
+        use_cache: bool = True,
     ) -> tuple[str, list[FunctionSnapshot]]:
         """Get the entity source at each commit that touched it."""
+        # The evolution only changes when HEAD moves
+        head_sha = get_head_sha(self.repo) if use_cache else None
+        cache_key = None
+        if head_sha is not None:
+            cache_key = history_cache_key(
+                "git",
+                str(self.repo_path),
+                head_sha,
+                file_path,
+                func_name,
+                language,
+                entity_type,
+                since,
+                max_commits,
+            )
+            cached = load_cached_history(cache_key)
+            if isinstance(cached, tuple):
+                return cached
+
+        result = self._walk_function_evolution(
+            file_path, func_name, language, entity_type, since, max_commits
+        )
+        if cache_key is not None:
+            save_cached_history(cache_key, result)
+        return result
+
+    def _walk_function_evolution(
+        self,
+        file_path: str,
+        func_name: str,
+        language: str,
+        entity_type: str,
+        since: datetime | None,
+        max_commits: int | None,
+    ) -> tuple[str, list[FunctionSnapshot]]:
+        """Build the evolution by walking the file's commits."""
         snapshots: list[FunctionSnapshot] = []
-        commits = self._get_file_commits(file_path)
 
         # If auto-detecting, find the entity type from the current file
         detected_type = entity_type
@@ -65,7 +132,9 @@ class GitProvider(Provider):
                     detected_type = func_info.entity_type
                 else:
                     # Try to find in the most recent commit that has the file
-                    for commit_info in commits:
+                    for commit_info in self._get_file_commits(
+                        file_path, since, max_commits
+                    ):
                         source = self.get_file_content(file_path, commit_info.hash)
                         if source:
                             func_info = find_entity(source, func_name, "auto", language)
@@ -77,15 +146,55 @@ class GitProvider(Provider):
             if detected_type == "auto":
                 detected_type = "function"
 
+        find = prepare_finder(language, func_name, detected_type)
         prev_source: str | None = None
 
+        # Diffs for the whole walk come from one `git log -p`, so commits that
+        # only change other parts of the file can skip reading and parsing it
+        diff_hunks = dict(iter_commit_diffs(self.repo, file_path, since, max_commits))
+        prev_blob: str | None = None  # File version at the last walked commit
+        prev_range: tuple[int, int] | None = None  # Entity lines in prev_blob
+
+        # Read each version straight from its blob, and only search each
+        # distinct version once (reverts and merges bring back old blobs)
+        blob_shas = get_file_blob_shas(self.repo, file_path, since, max_commits)
+        found: dict[str, FunctionInfo | None] = {}
+
         # Process from oldest to newest
-        for commit_info in reversed(commits):
-            source = self.get_file_content(file_path, commit_info.hash)
+        for commit_info in self._get_file_commits(
+            file_path, since, max_commits, reverse=True
+        ):
+            # The hunks are against the first parent, so they only say where
+            # prev_range moved if the file there is the version walked last
+            # (not so for branch commits in a merged history)
+            old_blob, new_blob = blob_shas.get(commit_info.hash, (None, None))
+            unchanged_since_prev = old_blob is not None and old_blob == prev_blob
+            prev_blob = new_blob
+            hunks = diff_hunks.get(commit_info.hash)
+            if prev_range is not None and hunks is not None and unchanged_since_prev:
+                shifted = shift_range_past_hunks(hunks, *prev_range)
+                if shifted is not None:
+                    # Untouched - just follow the lines it moved to
+                    prev_range = shifted
+                    continue
+
+            prev_range = None
+            if commit_info.hash in blob_shas:
+                blob_sha = new_blob
+                source = self._read_blob(blob_sha) if blob_sha else None
+            else:
+                # Not in the log output - fall back to walking the tree
+                blob_sha = None
+                source = self.get_file_content(file_path, commit_info.hash)
             if source is None:
                 continue
 
-            func_info = find_entity(source, func_name, detected_type, language)
+            if blob_sha in found:
+                func_info = found[blob_sha]
+            else:
+                func_info = find(source)
+                if blob_sha is not None:
+                    found[blob_sha] = func_info
             if func_info is None:
                 # Function doesn't exist at this commit
                 if prev_source is not None:
@@ -103,10 +212,8 @@ class GitProvider(Provider):
                 continue
 
             # Extract function source
-            lines = source.split("\n")
-            func_source = "\n".join(
-                lines[func_info.start_line - 1 : func_info.end_line]
-            )
+            prev_range = (func_info.start_line, func_info.end_line)
+            func_source = slice_lines(source, func_info.start_line, func_info.end_line)
 
             if prev_source is None:
                 # Function was created
@@ -134,3 +241,23 @@ class GitProvider(Provider):
                 prev_source = func_source
 
         return (detected_type, snapshots)
+
+    def _get_file_content_pygit2(self, file_path: str, ref: str) -> str | None:
+        """get_file_content, reading the objects with libgit2."""
+        try:
+            commit = self._objects.revparse_single(ref).peel(pygit2.Commit)
+            blob = commit.tree[file_path]
+            if not isinstance(blob, pygit2.Blob):
+                return None
+            return blob.data.decode("utf-8")
+        except (KeyError, UnicodeDecodeError):
+            return None
+
+    def _read_blob(self, blob_sha: str) -> str | None:
+        """Get the content of a blob, or None if it isn't UTF-8 text."""
+        try:
+            if self._objects is not None:
+                return self._objects[blob_sha].data.decode("utf-8")
+            return self.repo.odb.stream(bytes.fromhex(blob_sha)).read().decode("utf-8")
+        except UnicodeDecodeError:
+            return None
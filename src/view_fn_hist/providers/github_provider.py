@@ -3,13 +3,31 @@
 import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import cache, lru_cache
+from urllib.parse import urlsplit
 
-from github import Github, Auth
+from github import Github, Auth, UnknownObjectException
 
-from ..parser import find_entity
+from ..cache import (
+    content_cache_key,
+    history_cache_key,
+    load_cached_content,
+    load_cached_history,
+    save_cached_content,
+    save_cached_history,
+)
+from ..parser import find_entity, prepare_finder, slice_lines
 from .base import CommitInfo, FunctionSnapshot, Provider
 
+# Concurrent file fetches; more than this trips GitHub's secondary rate limits
+FETCH_WORKERS = 8
 
+_COMMIT_SHA_RE = re.compile(r"[0-9a-f]{40}")
+
+
+@lru_cache(maxsize=512)
 def parse_github_url(url: str) -> tuple[str, str, str | None, str | None]:
     """
     Parse a GitHub URL to extract owner, repo, branch, and file path.
@@ -22,13 +40,15 @@ def parse_github_url(url: str) -> tuple[str, str, str | None, str | None]:
 
     Returns: (owner, repo, branch or None, file_path or None)
     """
-    # Remove protocol if present
-    url = re.sub(r"^https?://", "", url)
+    # urlsplit only finds the host when there's a scheme
+    if not url.startswith(("http://", "https://")):
+        url = f"https://{url}"
+    split = urlsplit(url)
 
-    # Remove github.com prefix
-    url = re.sub(r"^github\.com/", "", url)
+    # Without a github.com host, the first path part was taken as the host
+    path = split.path if split.netloc == "github.com" else split.netloc + split.path
 
-    parts = url.split("/")
+    parts = path.strip("/").split("/", 4)
     if len(parts) < 2:
         raise ValueError(f"Invalid GitHub URL: {url}")
 
@@ -42,11 +62,28 @@ def parse_github_url(url: str) -> tuple[str, str, str | None, str | None]:
         branch = parts[3]
         # Everything after branch is the file path
         if len(parts) > 4:
-            file_path = "/".join(parts[4:])
+            file_path = parts[4]
 
     return owner, repo, branch, file_path
 
 
+def _commit_options(file_path: str, since: datetime | None) -> dict:
+    """Build the get_commits arguments for the commits touching a file."""
+    commit_options = {"path": file_path}
+    if since is not None:
+        commit_options["since"] = since
+    return commit_options
+
+
+@cache
+def _github_client(token: str | None) -> Github:
+    """Get a GitHub client, shared so its HTTP connections are reused."""
+    if token:
+        return Github(auth=Auth.Token(token))
+    # Unauthenticated (lower rate limits)
+    return Github()
+
+
 class GitHubProvider(Provider):
     """Provider for GitHub repositories via API."""
 
@@ -63,34 +100,59 @@ class GitHubProvider(Provider):
         )
 
         # Get token from parameter or environment
-        token = token or os.environ.get("GITHUB_TOKEN")
-        if token:
-            auth = Auth.Token(token)
-            self.github = Github(auth=auth)
-        else:
-            # Unauthenticated (lower rate limits)
-            self.github = Github()
+        self.github = _github_client(token or os.environ.get("GITHUB_TOKEN"))
 
         self.repo = self.github.get_repo(f"{self.owner}/{self.repo_name}")
         self.default_branch = self.branch or self.repo.default_branch
 
     def get_file_content(self, file_path: str, ref: str = "HEAD") -> str | None:
         """Get file content at a specific ref."""
+        try:
+            return self._fetch_file_content(file_path, ref)
+        except Exception:
+            return None
+
+    def _fetch_file_content(self, file_path: str, ref: str) -> str | None:
+        """Get file content at a ref, raising if the request fails."""
         if ref == "HEAD":
             ref = self.default_branch
+
+        # Content at a commit SHA never changes, so it can be cached for good
+        cache_key = None
+        if _COMMIT_SHA_RE.fullmatch(ref):
+            cache_key = content_cache_key(
+                "github", self.owner, self.repo_name, ref, file_path
+            )
+            cached = load_cached_content(cache_key)
+            if cached is not None:
+                return cached
+
         try:
             content = self.repo.get_contents(file_path, ref=ref)
             if isinstance(content, list):
                 return None  # It's a directory
-            return content.decoded_content.decode("utf-8")
-        except Exception:
-            return None
+            source = content.decoded_content.decode("utf-8")
+        except (UnknownObjectException, UnicodeDecodeError):
+            return None  # Not there, or not text
+
+        if cache_key is not None:
+            save_cached_content(cache_key, source)
+        return source
 
-    def _get_file_commits(self, file_path: str) -> list[CommitInfo]:
-        """Get all commits that touched a specific file."""
+    def _get_file_commits(
+        self,
+        file_path: str,
+        since: datetime | None = None,
+        max_commits: int | None = None,
+    ) -> tuple[list[CommitInfo], bool]:
+        """
+        Get all commits that touched a specific file, newest first.
+
+        Returns the commits and whether they could all be fetched.
+        """
         commits = []
         try:
-            for commit in self.repo.get_commits(path=file_path):
+            for commit in self.repo.get_commits(**_commit_options(file_path, since)):
                 commits.append(
                     CommitInfo(
                         hash=commit.sha,
@@ -99,12 +161,27 @@ class GitHubProvider(Provider):
                         author_email=commit.commit.author.email or "",
                         timestamp=commit.commit.author.date,
                         message=commit.commit.message,
-                        subject=commit.commit.message.split("\n")[0].strip(),
+                        subject=commit.commit.message.partition("\n")[0].strip(),
                     )
                 )
+                if max_commits is not None and len(commits) >= max_commits:
+                    # Stop before requesting further pages
+                    break
         except Exception:
             print("Warning: Failed to fetch some commits from GitHub", file=sys.stderr)
-        return commits
+            return commits, False
+        return commits, True
+
+    def _get_latest_commit_sha(
+        self, file_path: str, since: datetime | None = None
+    ) -> str | None:
+        """Get the newest commit that touched a file, or None if unavailable."""
+        try:
+            commits = self.repo.get_commits(**_commit_options(file_path, since))
+            latest = next(iter(commits), None)
+        except Exception:
+            return None
+        return latest.sha if latest is not None else None
 
     def get_function_evolution(
         self,
@@ -112,15 +189,73 @@ class GitHubProvider(Provider):
         func_name: str,
         language: str,
         entity_type: str = "function",
+        since: datetime | None = None,
+        max_commits: int | None = None,
+        use_cache: bool = True,
     ) -> tuple[str, list[FunctionSnapshot]]:
         """Get the entity source at each commit that touched it."""
+        # The evolution only changes when a new commit touches the file
+        cache_key = None
+        latest_sha = (
+            self._get_latest_commit_sha(file_path, since) if use_cache else None
+        )
+        if latest_sha is not None:
+            cache_key = history_cache_key(
+                "github",
+                self.owner,
+                self.repo_name,
+                self.default_branch,
+                latest_sha,
+                file_path,
+                func_name,
+                language,
+                entity_type,
+                since,
+                max_commits,
+            )
+            cached = load_cached_history(cache_key)
+            if isinstance(cached, tuple):
+                return cached
+
+        detected_type, snapshots, complete = self._walk_function_evolution(
+            file_path, func_name, language, entity_type, since, max_commits
+        )
+        # Don't keep a history with versions missing from failed requests
+        if cache_key is not None and complete:
+            save_cached_history(cache_key, (detected_type, snapshots))
+        return detected_type, snapshots
+
+    def _walk_function_evolution(
+        self,
+        file_path: str,
+        func_name: str,
+        language: str,
+        entity_type: str,
+        since: datetime | None,
+        max_commits: int | None,
+    ) -> tuple[str, list[FunctionSnapshot], bool]:
+        """
+        Build the evolution from the GitHub API.
+
+        Returns the detected type, the snapshots, and whether every request
+        they needed succeeded.
+        """
         snapshots: list[FunctionSnapshot] = []
-        commits = self._get_file_commits(file_path)
+        commits, complete = self._get_file_commits(file_path, since, max_commits)
+
+        def fetch(ref: str) -> str | None:
+            nonlocal complete
+            try:
+                return self._fetch_file_content(file_path, ref)
+            except Exception:
+                # Carry on without this version, as get_file_content would
+                complete = False
+                return None
 
         # If auto-detecting, find the entity type from the current file
         detected_type = entity_type
         if entity_type == "auto":
-            current_source = self.get_file_content(file_path)
+            current_source = fetch("HEAD")
             if current_source:
                 func_info = find_entity(current_source, func_name, "auto", language)
                 if func_info:
@@ -128,7 +263,7 @@ class GitHubProvider(Provider):
                 else:
                     # Try to find in the most recent commit that has the file
                     for commit_info in commits:
-                        source = self.get_file_content(file_path, commit_info.hash)
+                        source = fetch(commit_info.hash)
                         if source:
                             func_info = find_entity(source, func_name, "auto", language)
                             if func_info:
@@ -139,15 +274,30 @@ class GitHubProvider(Provider):
             if detected_type == "auto":
                 detected_type = "function"
 
+        find = prepare_finder(language, func_name, detected_type)
         prev_source: str | None = None
+        prev_file_source: str | None = None
+
+        # Each version is a separate API round trip, so fetch them concurrently
+        ordered_commits = list(reversed(commits))
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            sources = list(
+                executor.map(
+                    fetch, [commit_info.hash for commit_info in ordered_commits]
+                )
+            )
 
         # Process from oldest to newest
-        for commit_info in reversed(commits):
-            source = self.get_file_content(file_path, commit_info.hash)
+        for commit_info, source in zip(ordered_commits, sources):
             if source is None:
                 continue
 
-            func_info = find_entity(source, func_name, detected_type, language)
+            # Same file contents as the last version - nothing can have changed
+            if source == prev_file_source:
+                continue
+            prev_file_source = source
+
+            func_info = find(source)
             if func_info is None:
                 # Function doesn't exist at this commit
                 if prev_source is not None:
@@ -165,10 +315,7 @@ class GitHubProvider(Provider):
                 continue
 
             # Extract function source
-            lines = source.split("\n")
-            func_source = "\n".join(
-                lines[func_info.start_line - 1 : func_info.end_line]
-            )
+            func_source = slice_lines(source, func_info.start_line, func_info.end_line)
 
             if prev_source is None:
                 # Function was created
@@ -195,4 +342,4 @@ class GitHubProvider(Provider):
                 )
                 prev_source = func_source
 
-        return (detected_type, snapshots)
+        return detected_type, snapshots, complete
@@ -3,58 +3,92 @@
 import hashlib
 import json
 import os
-from pathlib import Path
-
-import litellm
-
-# Suppress litellm's verbose output
-litellm.suppress_debug_info = True
+from collections.abc import Callable
+from functools import cache
 
+from .cache import CACHE_DIR, json_dumps, json_loads
 from .providers import FunctionSnapshot
 
 DEFAULT_MODEL = "openrouter/google/gemini-flash-1.5"
-CACHE_DIR = Path.home() / ".cache" / "view-fn-hist"
+
+# Environment variable holding the API key, by model name prefix
+API_KEY_ENV_VARS = {
+    "openrouter/": "OPENROUTER_API_KEY",
+    "gemini/": "GEMINI_API_KEY",
+    "gpt-": "OPENAI_API_KEY",
+    "openai/": "OPENAI_API_KEY",
+    "claude-": "ANTHROPIC_API_KEY",
+    "anthropic/": "ANTHROPIC_API_KEY",
+}
+
+
+@cache
+def load_litellm():
+    """Import litellm on first use, since importing it takes a while."""
+    import litellm
+
+    # Suppress litellm's verbose output
+    litellm.suppress_debug_info = True
+    return litellm
+
+
+def api_key_env_var(model: str) -> str | None:
+    """Get the environment variable for a model's API key, or None if unknown."""
+    for prefix, env_var in API_KEY_ENV_VARS.items():
+        if model.startswith(prefix):
+            return env_var
+    return None
 
 
-def _get_cache_key(
+def summary_cache_key(
     entity_name: str,
     file_path: str,
     snapshots: list[FunctionSnapshot],
     entity_type: str = "function",
 ) -> str:
-    """Generate a cache key based on entity identity and history."""
+    """Generate a summary's cache key, based on entity identity and history."""
     # Include commit hashes to invalidate cache when history changes
     commit_hashes = "-".join(s.commit.short_hash for s in snapshots)
     key_str = f"{file_path}:{entity_type}:{entity_name}:{commit_hashes}"
     return hashlib.md5(key_str.encode()).hexdigest()
 
 
+# Summaries already read from or written to disk by this process. Misses
+# aren't kept, since another process may cache the summary in the meantime.
+_known_summaries: dict[str, str] = {}
+
+
 def _get_cached_summary(cache_key: str) -> str | None:
     """Try to get a cached summary."""
+    summary = _known_summaries.get(cache_key)
+    if summary is not None:
+        return summary
+
     cache_file = CACHE_DIR / f"{cache_key}.json"
-    if cache_file.exists():
-        try:
-            data = json.loads(cache_file.read_text())
-            return data.get("summary")
-        except (json.JSONDecodeError, IOError):
-            return None
-    return None
+    try:
+        summary = json_loads(cache_file.read_bytes()).get("summary")
+    except (json.JSONDecodeError, OSError):
+        return None
+    if summary:
+        _known_summaries[cache_key] = summary
+    return summary
 
 
 def _save_cached_summary(cache_key: str, summary: str, model: str):
     """Save a summary to cache."""
+    _known_summaries[cache_key] = summary
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
     cache_file = CACHE_DIR / f"{cache_key}.json"
     try:
-        cache_file.write_text(
-            json.dumps(
+        cache_file.write_bytes(
+            json_dumps(
                 {
                     "summary": summary,
                     "model": model,
                 }
             )
         )
-    except IOError:
+    except OSError:
         pass  # Ignore cache write failures
 
 
@@ -115,10 +149,49 @@ def is_cached(
     """Check if a summary is cached."""
     if not snapshots:
         return True  # No LLM call needed for empty snapshots
-    cache_key = _get_cache_key(entity_name, file_path, snapshots, entity_type)
+    cache_key = summary_cache_key(entity_name, file_path, snapshots, entity_type)
     return _get_cached_summary(cache_key) is not None
 
 
+def _prepare_summary(
+    entity_name: str,
+    file_path: str,
+    snapshots: list[FunctionSnapshot],
+    model: str | None,
+    debug: bool,
+    entity_type: str,
+) -> tuple[str | None, str, str, str]:
+    """
+    Do the checks shared by the sync and async summary paths.
+
+    Returns (result, model, cache_key, prompt). If result isn't None, it's
+    the answer and no LLM request is needed.
+    """
+    # Get model from env var, parameter, or default
+    model = model or os.environ.get("VIEW_FN_HIST_MODEL", DEFAULT_MODEL)
+
+    if not snapshots:
+        return "No history available.", model, "", ""
+
+    # Check cache first
+    cache_key = summary_cache_key(entity_name, file_path, snapshots, entity_type)
+    cached = _get_cached_summary(cache_key)
+    if cached:
+        if debug:
+            print("(using cached summary)")
+        return f"(cached) {cached}", model, cache_key, ""
+
+    # Without an API key the request can only fail, so skip building it
+    env_var = api_key_env_var(model)
+    if env_var is not None and not os.environ.get(env_var):
+        if debug:
+            print(f"({env_var} not set, skipping summary)")
+        return "", model, cache_key, ""
+
+    prompt = build_prompt(entity_name, file_path, snapshots, entity_type)
+    return None, model, cache_key, prompt
+
+
 def generate_evolution_summary(
     entity_name: str,
     file_path: str,
@@ -126,6 +199,7 @@ def generate_evolution_summary(
     model: str | None = None,
     debug: bool = False,
     entity_type: str = "function",
+    on_progress: Callable[[str], None] | None = None,
 ) -> str:
     """
     Generate a summary of how the entity has evolved over time.
@@ -133,27 +207,74 @@ def generate_evolution_summary(
     Uses an LLM to analyze the commit messages and code changes.
     Caches results to avoid repeated API calls.
 
+    If on_progress is given, the response is streamed and on_progress is
+    called with the summary so far as it arrives.
+
     Model can be configured via VIEW_FN_HIST_MODEL env var.
     """
-    # Get model from env var, parameter, or default
-    model = model or os.environ.get("VIEW_FN_HIST_MODEL", DEFAULT_MODEL)
+    result, model, cache_key, prompt = _prepare_summary(
+        entity_name, file_path, snapshots, model, debug, entity_type
+    )
+    if result is not None:
+        return result
 
-    if not snapshots:
-        return "No history available."
+    try:
+        if on_progress is None:
+            response = load_litellm().completion(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=300,
+            )
+            summary = response.choices[0].message.content.strip()
+        else:
+            parts = []
+            for chunk in load_litellm().completion(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=300,
+                stream=True,
+            ):
+                content = chunk.choices[0].delta.content
+                if content:
+                    parts.append(content)
+                    on_progress("".join(parts).strip())
+            summary = "".join(parts).strip()
 
-    # Check cache first
-    cache_key = _get_cache_key(entity_name, file_path, snapshots, entity_type)
-    cached = _get_cached_summary(cache_key)
-    if cached:
-        if debug:
-            print("(using cached summary)")
-        return f"(cached) {cached}"
+        # Cache the result
+        _save_cached_summary(cache_key, summary, model)
+
+        return summary
+    except Exception as e:
+        # Print error to stderr for debugging, then skip summary
+        import sys
+
+        print(f"LLM Error: {e}", file=sys.stderr)
+        return ""
 
-    # Build the prompt
-    prompt = build_prompt(entity_name, file_path, snapshots, entity_type)
+
+async def generate_evolution_summary_async(
+    entity_name: str,
+    file_path: str,
+    snapshots: list[FunctionSnapshot],
+    model: str | None = None,
+    debug: bool = False,
+    entity_type: str = "function",
+    run_later: Callable[..., object] | None = None,
+) -> str:
+    """
+    Async version of generate_evolution_summary, for use in an event loop.
+
+    If run_later is given (e.g. FastAPI's BackgroundTasks.add_task), the
+    cache write is handed to it instead of done before returning.
+    """
+    result, model, cache_key, prompt = _prepare_summary(
+        entity_name, file_path, snapshots, model, debug, entity_type
+    )
+    if result is not None:
+        return result
 
     try:
-        response = litellm.completion(
+        response = await load_litellm().acompletion(
             model=model,
             messages=[{"role": "user", "content": prompt}],
             max_tokens=300,
@@ -161,7 +282,11 @@ def generate_evolution_summary(
         summary = response.choices[0].message.content.strip()
 
         # Cache the result
-        _save_cached_summary(cache_key, summary, model)
+        if run_later is None:
+            _save_cached_summary(cache_key, summary, model)
+        else:
+            _known_summaries[cache_key] = summary
+            run_later(_save_cached_summary, cache_key, summary, model)
 
         return summary
     except Exception as e:
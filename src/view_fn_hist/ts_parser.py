@@ -1,12 +1,16 @@
 """Tree-sitter based parser for multi-language entity detection."""
 
+import threading
 import warnings
-from dataclasses import dataclass
+from dataclasses import astuple, dataclass
+from functools import cache
 
 # Suppress tree-sitter deprecation warnings about Language(path, name)
 warnings.filterwarnings("ignore", category=FutureWarning, module="tree_sitter")
 
-from tree_sitter_languages import get_parser
+from tree_sitter_languages import get_language, get_parser
+
+from .cache import entity_cache_key, load_cached_entities, save_cached_entities
 
 
 @dataclass
@@ -70,14 +74,16 @@ ENTITY_PATTERNS = {
 }
 
 
-def find_entity_auto(source: str, entity_name: str, language: str) -> EntityInfo | None:
+def find_entity_auto(
+    source: str | bytes, entity_name: str, language: str
+) -> EntityInfo | None:
     """
     Find an entity by name, automatically detecting its type.
 
     Searches across all entity types for the given language.
 
     Args:
-        source: The source code to search
+        source: The source code to search, as text or UTF-8 bytes
         entity_name: Name of the entity to find
         language: Programming language
 
@@ -88,29 +94,31 @@ def find_entity_auto(source: str, entity_name: str, language: str) -> EntityInfo
     if not ts_lang:
         return None
 
-    patterns = ENTITY_PATTERNS.get(ts_lang, {})
+    # Collect the first match of each type from a single pass over the file
+    matches: dict[str, EntityInfo] = {}
+    for entity in _find_entities(ts_lang, source):
+        if entity.name == entity_name:
+            matches.setdefault(entity.entity_type, entity)
 
-    # Try each entity type in order of specificity
+    # Pick by order of specificity
     # (structs/classes before functions, since a struct named X is more specific than a function named X)
     type_order = ["struct", "class", "enum", "interface", "impl", "function"]
 
     for entity_type in type_order:
-        if entity_type in patterns:
-            result = find_entity(source, entity_name, entity_type, language)
-            if result:
-                return result
+        if entity_type in matches:
+            return matches[entity_type]
 
     return None
 
 
 def find_entity(
-    source: str, entity_name: str, entity_type: str, language: str
+    source: str | bytes, entity_name: str, entity_type: str, language: str
 ) -> EntityInfo | None:
     """
     Find an entity by name and type using tree-sitter.
 
     Args:
-        source: The source code to search
+        source: The source code to search, as text or UTF-8 bytes
         entity_name: Name of the entity to find
         entity_type: Type of entity ("function", "struct", "class", etc.)
         language: Programming language
@@ -122,75 +130,26 @@ def find_entity(
     if not ts_lang:
         return None
 
-    patterns = ENTITY_PATTERNS.get(ts_lang, {})
-    pattern = patterns.get(entity_type)
-    if not pattern:
-        return None
-
-    node_type, name_field, name_node_type = pattern
-
-    try:
-        parser = get_parser(ts_lang)
-        tree = parser.parse(source.encode("utf-8"))
-    except Exception:
+    if entity_type not in ENTITY_PATTERNS.get(ts_lang, {}):
         return None
 
-    # Walk the tree to find matching entities
-    def find_in_node(node):
-        if node.type == node_type:
-            # Try to get the name from the expected field
-            name_node = None
-
-            if name_field:
-                name_node = node.child_by_field_name(name_field)
-
-            # For impl blocks in Rust, we need special handling
-            if ts_lang == "rust" and entity_type == "impl":
-                # Look for the type being implemented
-                name_node = node.child_by_field_name("type")
-                if name_node and name_node.type == "generic_type":
-                    # Handle generic types like Foo<T>
-                    type_node = name_node.child_by_field_name("type")
-                    if type_node:
-                        name_node = type_node
-
-            if name_node and name_node.text:
-                found_name = name_node.text.decode("utf-8")
-                if found_name == entity_name:
-                    # Get the signature (first line or declaration)
-                    lines = source.split("\n")
-                    start_line = node.start_point[0]
-                    signature = (
-                        lines[start_line].strip() if start_line < len(lines) else None
-                    )
-
-                    return EntityInfo(
-                        name=entity_name,
-                        entity_type=entity_type,
-                        start_line=node.start_point[0] + 1,  # 1-indexed
-                        end_line=node.end_point[0] + 1,  # 1-indexed
-                        signature=signature,
-                    )
-
-        # Recursively search children
-        for child in node.children:
-            result = find_in_node(child)
-            if result:
-                return result
+    # Filtering every entity in the file lets all lookups in the same source
+    # share one parse, and one cache entry
+    for entity in _find_entities(ts_lang, source):
+        if entity.entity_type == entity_type and entity.name == entity_name:
+            return entity
 
-        return None
-
-    return find_in_node(tree.root_node)
+    return None
 
 
 def find_all_entities(
-    source: str, language: str, entity_types: list[str] | None = None
+    source: str | bytes, language: str, entity_types: list[str] | None = None
 ) -> list[EntityInfo]:
     """
     Find all entities of specified types in source code.
 
     Args:
-        source: The source code to search
+        source: The source code to search, as text or UTF-8 bytes
         language: Programming language
         entity_types: List of entity types to find, or None for all
 
@@ -208,50 +167,183 @@ def find_all_entities(
     if not patterns:
         return []
 
+    return [
+        entity
+        for entity in _find_entities(ts_lang, source)
+        if entity.entity_type in patterns
+    ]
+
+
+def _find_entities(ts_lang: str, source: str | bytes) -> list[EntityInfo]:
+    """
+    Find every entity in source, in source order.
+
+    Results are cached on disk by content, since the same versions of a file
+    are looked up again across snapshots and runs.
+    """
+    patterns = ENTITY_PATTERNS.get(ts_lang)
+    if not patterns:
+        return []
+
+    source_bytes = source.encode("utf-8") if isinstance(source, str) else source
+    cache_key = entity_cache_key(ts_lang, source_bytes)
+    cached = load_cached_entities(cache_key)
+    if cached is not None:
+        return [EntityInfo(*row) for row in cached]
+
     try:
-        parser = get_parser(ts_lang)
-        tree = parser.parse(source.encode("utf-8"))
+        tree = _parse(ts_lang, source_bytes)
     except Exception:
         return []
 
     entities = []
-    lines = source.split("\n")
-
-    def find_in_node(node):
-        for entity_type, (node_type, name_field, _) in patterns.items():
-            if node.type == node_type:
-                name_node = None
-
-                if name_field:
-                    name_node = node.child_by_field_name(name_field)
-
-                # Special handling for Rust impl
-                if ts_lang == "rust" and entity_type == "impl":
-                    name_node = node.child_by_field_name("type")
-                    if name_node and name_node.type == "generic_type":
-                        type_node = name_node.child_by_field_name("type")
-                        if type_node:
-                            name_node = type_node
-
-                if name_node and name_node.text:
-                    found_name = name_node.text.decode("utf-8")
-                    start_line = node.start_point[0]
-                    signature = (
-                        lines[start_line].strip() if start_line < len(lines) else None
-                    )
-
-                    entities.append(
-                        EntityInfo(
-                            name=found_name,
-                            entity_type=entity_type,
-                            start_line=node.start_point[0] + 1,
-                            end_line=node.end_point[0] + 1,
-                            signature=signature,
-                        )
-                    )
-
-        for child in node.children:
-            find_in_node(child)
-
-    find_in_node(tree.root_node)
+    query = _entity_query(ts_lang, tuple(patterns))
+    for node, entity_type in query.captures(tree.root_node):
+        name_field = patterns[entity_type][1]
+        name_node = _entity_name_node(node, ts_lang, entity_type, name_field)
+        if name_node and name_node.text:
+            found_name = name_node.text.decode("utf-8", errors="replace")
+            # Get the signature (first line or declaration)
+            signature = _line_at(source_bytes, node.start_byte).strip()
+
+            entities.append(
+                EntityInfo(
+                    name=found_name,
+                    entity_type=entity_type,
+                    start_line=node.start_point[0] + 1,  # 1-indexed
+                    end_line=node.end_point[0] + 1,  # 1-indexed
+                    signature=signature,
+                )
+            )
+
+    save_cached_entities(cache_key, [astuple(entity) for entity in entities])
     return entities
+
+
+@cache
+def _entity_query(ts_lang: str, entity_types: tuple[str, ...]):
+    """
+    Compile a query for the nodes of the given entity types.
+
+    Each node is captured under its entity type, in source order. Matching
+    node types in tree-sitter's query engine saves creating a Python object
+    for every node in the tree.
+    """
+    patterns = ENTITY_PATTERNS[ts_lang]
+    query = " ".join(f"({patterns[t][0]}) @{t}" for t in entity_types)
+    return get_language(ts_lang).query(query)
+
+
+def _entity_name_node(node, ts_lang: str, entity_type: str, name_field: str | None):
+    """Get the node holding an entity's name, or None."""
+    # For impl blocks in Rust, we need special handling
+    if ts_lang == "rust" and entity_type == "impl":
+        # Look for the type being implemented
+        name_node = node.child_by_field_name("type")
+        if name_node and name_node.type == "generic_type":
+            # Handle generic types like Foo<T>
+            type_node = name_node.child_by_field_name("type")
+            if type_node:
+                name_node = type_node
+        return name_node
+
+    if name_field:
+        return node.child_by_field_name(name_field)
+    return None
+
+
+# Per-thread parsers, and the last parse per language: {ts_lang: (source, tree)}
+_last_parse = threading.local()
+
+
+def _parse(ts_lang: str, source: bytes):
+    """
+    Parse source, reusing the previous tree for the same language.
+
+    Successive calls usually see the same file at neighbouring commits (or
+    the very same source, when looking up several entity types), so the
+    previous tree is edited to match and tree-sitter only re-parses the
+    changed region.
+    """
+    last = getattr(_last_parse, "trees", None)
+    if last is None:
+        last = _last_parse.trees = {}
+        _last_parse.parsers = {}
+
+    # Parsers aren't thread-safe, but each thread can keep reusing its own
+    parser = _last_parse.parsers.get(ts_lang)
+    if parser is None:
+        parser = _last_parse.parsers[ts_lang] = get_parser(ts_lang)
+    previous = last.get(ts_lang)
+    if previous is None:
+        tree = parser.parse(source)
+    else:
+        old_source, old_tree = previous
+        if old_source == source:
+            return old_tree
+        # The edit changes old_tree in place, so drop it until the new parse
+        # succeeds; otherwise a failed parse would leave it out of step with
+        # old_source
+        del last[ts_lang]
+        _edit_tree(old_tree, old_source, source)
+        tree = parser.parse(source, old_tree)
+
+    last[ts_lang] = (source, tree)
+    return tree
+
+
+def _edit_tree(tree, old_source: bytes, new_source: bytes):
+    """Describe the change from old_source to new_source as one tree edit."""
+    prefix = _common_prefix_len(old_source, new_source)
+    suffix = _common_suffix_len(old_source, new_source, prefix)
+
+    start_byte = prefix
+    old_end_byte = len(old_source) - suffix
+    new_end_byte = len(new_source) - suffix
+    tree.edit(
+        start_byte=start_byte,
+        old_end_byte=old_end_byte,
+        new_end_byte=new_end_byte,
+        start_point=_byte_to_point(old_source, start_byte),
+        old_end_point=_byte_to_point(old_source, old_end_byte),
+        new_end_point=_byte_to_point(new_source, new_end_byte),
+    )
+
+
+def _common_prefix_len(a: bytes, b: bytes) -> int:
+    """Length of the common prefix, by binary search over slice comparisons."""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix_len(a: bytes, b: bytes, prefix: int) -> int:
+    """Length of the common suffix, not overlapping the common prefix."""
+    lo, hi = 0, min(len(a), len(b)) - prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid :] == b[len(b) - mid :]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _line_at(source: bytes, byte: int) -> str:
+    """Get the line containing a byte offset, without splitting the whole source."""
+    start = source.rfind(b"\n", 0, byte) + 1
+    end = source.find(b"\n", byte)
+    line = source[start : end if end >= 0 else len(source)]
+    return line.decode("utf-8", errors="replace")
+
+
+def _byte_to_point(source: bytes, byte: int) -> tuple[int, int]:
+    """Convert a byte offset to a tree-sitter (row, column) point."""
+    row = source.count(b"\n", 0, byte)
+    column = byte - (source.rfind(b"\n", 0, byte) + 1)
+    return row, column
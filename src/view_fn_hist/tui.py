@@ -1,7 +1,5 @@
 """TUI for navigating function evolution using textual."""
 
-import difflib
-
 from rich.text import Text
 from textual import work
 from textual.app import App, ComposeResult
@@ -9,35 +7,36 @@ from textual.binding import Binding
 from textual.containers import Container
 from textual.widgets import Static, Rule
 
+from .diff import compute_changed_lines
 from .providers import FunctionSnapshot
 from .summarizer import generate_evolution_summary
 
 
-def compute_changed_lines(old_source: str | None, new_source: str) -> set[int]:
-    """
-    Compute which lines in new_source are different from old_source.
-
-    Returns set of 0-indexed line numbers that changed.
-    """
-    if old_source is None:
-        # All lines are new
-        return set(range(len(new_source.split("\n"))))
-
-    old_lines = old_source.split("\n")
-    new_lines = new_source.split("\n")
-
-    changed = set()
-
-    # Use SequenceMatcher to find differences
-    matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
-
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-        if tag in ("replace", "insert"):
-            # Lines j1 to j2 in new are changed/added
-            for j in range(j1, j2):
-                changed.add(j)
+def render_source(source: str, start_line: int, changed_lines: set[int]) -> Text:
+    """Render source with line numbers, highlighting the changed lines."""
+    # Collect (text, style) pieces and add them in one go, which skips the
+    # per-call overhead of Text.append
+    tokens = []
+    lines = source.split("\n")
+    # Pad every line number to the widest one, once, rather than parsing a
+    # format spec per line
+    width = max(5, len(str(start_line + len(lines) - 1)))
+    for i, line in enumerate(lines):
+        line_num_str = str(start_line + i).rjust(width) + " │ "
+
+        if i in changed_lines:
+            # Highlight changed lines in green
+            tokens.append((line_num_str, "bold green"))
+            tokens.append((line, "green" if line else None))
+        else:
+            tokens.append((line_num_str, "dim"))
+            tokens.append((line, None))
+        tokens.append(("\n", None))
+    tokens.pop()  # No newline after the last line
 
-    return changed
+    text = Text()
+    text.append_tokens(tokens)
+    return text
 
 
 class FunctionSourceView(Static):
@@ -48,46 +47,43 @@ class FunctionSourceView(Static):
         self._source = source
         self._start_line = start_line
         self._changed_lines: set[int] = set()
+        self._text: Text | None = None
 
     def update_source(
-        self, source: str, start_line: int, changed_lines: set[int] | None = None
+        self,
+        source: str,
+        start_line: int,
+        changed_lines: set[int] | None = None,
+        text: Text | None = None,
     ):
-        """Update the displayed source code."""
+        """Update the displayed source code, optionally already rendered."""
+        changed_lines = changed_lines or set()
+        if (
+            self._text is not None
+            and source == self._source
+            and start_line == self._start_line
+            and changed_lines == self._changed_lines
+        ):
+            return  # Already showing this
+
         self._source = source
         self._start_line = start_line
-        self._changed_lines = changed_lines or set()
+        self._changed_lines = changed_lines
+        self._text = text
         self._render_source()
 
     def _render_source(self):
         """Render source with line numbers and highlighting."""
-        lines = self._source.split("\n")
-        text = Text()
-
-        for i, line in enumerate(lines):
-            line_num = self._start_line + i
-
-            # Check if this line changed
-            is_changed = i in self._changed_lines
-
-            # Format line number
-            line_num_str = f"{line_num:5d} │ "
-
-            if is_changed:
-                # Highlight changed lines in green
-                text.append(line_num_str, style="bold green")
-                text.append(line, style="green")
-            else:
-                text.append(line_num_str, style="dim")
-                text.append(line)
-
-            if i < len(lines) - 1:
-                text.append("\n")
-
-        self.update(text)
+        if self._text is None:
+            self._text = render_source(
+                self._source, self._start_line, self._changed_lines
+            )
+        self.update(self._text)
 
     def on_mount(self):
         """Called when widget is mounted."""
-        self._render_source()
+        if self._source:
+            self._render_source()
 
 
 class SummaryBar(Static):
@@ -229,6 +225,9 @@ class FunctionEvolutionApp(App):
         self.has_summary = False  # Track if valid summary was generated
         self.debug_mode = debug
         self.entity_type = entity_type
+        # Changed lines and rendered source per snapshot index, so revisiting
+        # one doesn't diff or render it again
+        self._render_cache: dict[int, tuple[set[int], Text]] = {}
 
     def compose(self) -> ComposeResult:
         """Create child widgets."""
@@ -266,6 +265,10 @@ class FunctionEvolutionApp(App):
             self.snapshots,
             debug=self.debug_mode,
             entity_type=self.entity_type,
+            # Show the summary as it streams in
+            on_progress=lambda partial: self.call_from_thread(
+                self._set_summary, partial
+            ),
         )
         # Update the summary bar from the main thread
         self.call_from_thread(self._set_summary, summary)
@@ -298,7 +301,12 @@ class FunctionEvolutionApp(App):
             prev_source = self.snapshots[self.current_index - 1].source
 
         # Compute which lines changed
-        changed_lines = compute_changed_lines(prev_source, snapshot.source)
+        cached = self._render_cache.get(self.current_index)
+        if cached is None:
+            changed_lines = compute_changed_lines(prev_source, snapshot.source)
+            text = render_source(snapshot.source, snapshot.start_line, changed_lines)
+            cached = self._render_cache[self.current_index] = (changed_lines, text)
+        changed_lines, text = cached
 
         # Show summary if we have one (always visible)
         summary_container = self.query_one("#summary-container")
@@ -313,7 +321,9 @@ class FunctionEvolutionApp(App):
 
         # Update source view with highlighting
         source_view = self.query_one("#source-view", FunctionSourceView)
-        source_view.update_source(snapshot.source, snapshot.start_line, changed_lines)
+        source_view.update_source(
+            snapshot.source, snapshot.start_line, changed_lines, text
+        )
 
     def action_previous(self):
         """Go to previous (older) snapshot."""
@@ -9,9 +9,36 @@ load_dotenv()
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from .routes import router
+from .static import PrecompressedStaticFiles, precompress_assets
+
+
+def _accepts_ndjson(scope: Scope) -> bool:
+    return "application/x-ndjson" in Headers(scope=scope).get("accept", "")
+
+
+class NDJSONPassthroughGZipMiddleware:
+    """GZip responses, except ND-JSON streams.
+
+    The analyze route streams ND-JSON when the request's Accept header asks
+    for it, so those requests skip compression. gzip would buffer the
+    stream's lines and delay the first one.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500) -> None:
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or _accepts_ndjson(scope):
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
 
 app = FastAPI(
     title="Function Evolution Viewer",
@@ -28,14 +55,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress API responses. Successive snapshots repeat most of their source,
+# so long histories shrink many times over.
+app.add_middleware(NDJSONPassthroughGZipMiddleware, minimum_size=1000)
+
 # Include API routes
 app.include_router(router)
 
 # Mount frontend static files if they exist
 frontend_dist = Path(__file__).parent / "frontend" / "dist"
 if frontend_dist.exists():
+    precompress_assets(frontend_dist)
     app.mount(
-        "/", StaticFiles(directory=str(frontend_dist), html=True), name="frontend"
+        "/",
+        PrecompressedStaticFiles(directory=str(frontend_dist), html=True),
+        name="frontend",
     )
 
 
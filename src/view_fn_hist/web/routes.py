@@ -1,87 +1,253 @@
 """API routes for the web application."""
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+import hashlib
+import pickle
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache, partial
+from typing import Annotated
 
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    HTTPException,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from ..cache import json_dumps
+from ..diff import compute_changed_lines
 from ..parser import detect_language
 from ..providers import GitHubProvider, FunctionSnapshot
 from ..providers.github_provider import parse_github_url
-from ..summarizer import generate_evolution_summary
-from ..tui import compute_changed_lines
+from ..summarizer import generate_evolution_summary_async, summary_cache_key
 from .schemas import (
     AnalyzeRequest,
     AnalyzeResponse,
-    CommitSchema,
-    SnapshotSchema,
+    AnalyzeSummaryResponse,
     SummaryRequest,
     SummaryResponse,
 )
 
 router = APIRouter(prefix="/api")
 
-# Simple in-memory cache for snapshots (avoids re-fetching from GitHub for summary)
-_snapshot_cache: dict[str, list[FunctionSnapshot]] = {}
+# Simple in-memory LRU cache for snapshots (avoids re-fetching from GitHub
+# for summary). Entries are compressed pickles: successive snapshots repeat
+# most of their source, so they shrink by 20x or more. Each is stored with
+# the digest of its snapshots' commits, for ETags without unpacking it.
+SNAPSHOT_CACHE_BYTES = 128 * 1024 * 1024
+_snapshot_cache: OrderedDict[str, tuple[str, bytes]] = OrderedDict()
+_snapshot_cache_bytes = 0
+
+# Providers by repo and branch, so repeat requests skip looking up the repo
+PROVIDER_CACHE_SIZE = 16
+_provider_cache: OrderedDict[tuple, GitHubProvider] = OrderedDict()
+_provider_cache_lock = threading.Lock()  # Providers are fetched in worker threads
+
+# GitHub fetches in progress, so concurrent requests for one entity share one
+_inflight: dict[str, asyncio.Task] = {}
 
 
 def _cache_key(url: str, func: str, entity_type: str = "function") -> str:
     return f"{url}:{entity_type}:{func}"
 
 
-def _get_cached_snapshots(
+async def _get_cached_snapshots(
     url: str, func: str, entity_type: str = "function"
-) -> list[FunctionSnapshot] | None:
-    return _snapshot_cache.get(_cache_key(url, func, entity_type))
+) -> tuple[list[FunctionSnapshot], list[list[int]]] | None:
+    key = _cache_key(url, func, entity_type)
+    entry = _snapshot_cache.get(key)
+    if entry is None:
+        return None
+    _snapshot_cache.move_to_end(key)
+    # Unpacking takes milliseconds for long histories, so keep it off the loop
+    return await run_in_threadpool(_unpack_snapshots, entry[1])
+
+
+def _pack_snapshots(
+    snapshots: list[FunctionSnapshot], changed_lines: list[list[int]]
+) -> bytes:
+    # Level 1 is several times faster than the default for a little less
+    # compression
+    return zlib.compress(pickle.dumps((snapshots, changed_lines), protocol=5), 1)
+
+
+def _unpack_snapshots(data: bytes) -> tuple[list[FunctionSnapshot], list[list[int]]]:
+    return pickle.loads(zlib.decompress(data))
 
 
-def _cache_snapshots(
+def _get_cached_digest(url: str, func: str, entity_type: str) -> str | None:
+    """Get the history digest of cached snapshots, without unpacking them."""
+    entry = _snapshot_cache.get(_cache_key(url, func, entity_type))
+    return entry[0] if entry is not None else None
+
+
+def _history_digest(snapshots: list[FunctionSnapshot]) -> str:
+    """Digest of the commits snapshots are at, which determine their content."""
+    hashes = " ".join(snapshot.commit.hash for snapshot in snapshots)
+    return hashlib.sha1(hashes.encode()).hexdigest()
+
+
+async def _cache_snapshots(
     url: str,
     func: str,
     snapshots: list[FunctionSnapshot],
+    changed_lines: list[list[int]],
     entity_type: str = "function",
 ):
-    # Keep cache small - only store last 20 queries
-    if len(_snapshot_cache) > 20:
-        # Remove oldest entry
-        oldest_key = next(iter(_snapshot_cache))
-        del _snapshot_cache[oldest_key]
-    _snapshot_cache[_cache_key(url, func, entity_type)] = snapshots
+    global _snapshot_cache_bytes
+    key = _cache_key(url, func, entity_type)
+    data = await run_in_threadpool(_pack_snapshots, snapshots, changed_lines)
+    old = _snapshot_cache.pop(key, None)
+    if old is not None:
+        _snapshot_cache_bytes -= len(old[1])
+    _snapshot_cache[key] = (_history_digest(snapshots), data)
+    _snapshot_cache_bytes += len(data)
+    # Keep cache small - drop the least recently used queries
+    while _snapshot_cache_bytes > SNAPSHOT_CACHE_BYTES and len(_snapshot_cache) > 1:
+        _, (_, evicted) = _snapshot_cache.popitem(last=False)
+        _snapshot_cache_bytes -= len(evicted)
 
 
-@router.post("/analyze", response_model=AnalyzeResponse)
-async def analyze_function(request: AnalyzeRequest):
-    """Analyze an entity's evolution from a GitHub URL."""
+def _get_provider(url: str) -> GitHubProvider:
+    owner, repo_name, branch, _ = parse_github_url(url)
+    key = (owner, repo_name, branch)
+    with _provider_cache_lock:
+        provider = _provider_cache.get(key)
+        if provider is not None:
+            _provider_cache.move_to_end(key)
+            return provider
+
+    provider = GitHubProvider(url)
+    with _provider_cache_lock:
+        _provider_cache[key] = provider
+        while len(_provider_cache) > PROVIDER_CACHE_SIZE:
+            _provider_cache.popitem(last=False)
+    return provider
+
+
+def _get_evolution(
+    url: str, file_path: str, func: str, language: str, entity_type: str
+) -> tuple[str, list[FunctionSnapshot], list[list[int]]]:
+    provider = _get_provider(url)
+    entity_type, snapshots = provider.get_function_evolution(
+        file_path, func, language, entity_type
+    )
+    return entity_type, snapshots, _changed_lines(snapshots)
+
+
+def _changed_lines(snapshots: list[FunctionSnapshot]) -> list[list[int]]:
+    """Get the lines of each snapshot that changed since the one before."""
+    changed_lines = []
+    prev_source = None
+    for snapshot in snapshots:
+        changed_lines.append(list(compute_changed_lines(prev_source, snapshot.source)))
+        prev_source = snapshot.source
+    return changed_lines
+
+
+async def _fetch_evolution(
+    url: str, file_path: str, func: str, language: str, entity_type: str
+) -> tuple[str, list[FunctionSnapshot], list[list[int]]]:
+    """
+    Fetch an entity's evolution and diffs in a worker thread, joining any
+    identical fetch.
+    """
+    key = _cache_key(url, func, entity_type)
+    task = _inflight.get(key)
+    if task is None:
+        # The fetch runs as its own task, so it carries on for the other
+        # requests if the one that started it goes away
+        task = _inflight[key] = asyncio.ensure_future(
+            run_in_threadpool(
+                _get_evolution, url, file_path, func, language, entity_type
+            )
+        )
+        task.add_done_callback(partial(_fetch_done, key))
+    # Shielded so a request being cancelled doesn't cancel the shared fetch
+    return await asyncio.shield(task)
+
+
+def _fetch_done(key: str, task: asyncio.Task):
+    """Forget a finished fetch, so later requests start a new one."""
+    del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # Mark it retrieved, in case nobody was waiting
+
+
+@dataclass(frozen=True)
+class ParsedURL:
+    """The parts of a request's GitHub URL that the routes need."""
+
+    owner: str
+    repo_name: str
+    file_path: str
+    language: str
+
+
+@lru_cache(maxsize=512)
+def _parse_url(github_url: str) -> ParsedURL | str:
+    """Parse a GitHub URL to a file, or get why it can't be analyzed."""
     # Parse the GitHub URL
     try:
-        owner, repo_name, branch, file_path = parse_github_url(request.github_url)
+        owner, repo_name, branch, file_path = parse_github_url(github_url)
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        return str(e)
 
     if not file_path:
-        raise HTTPException(
-            status_code=400,
-            detail="GitHub URL must include file path (e.g., /blob/main/src/file.rs)",
-        )
+        return "GitHub URL must include file path (e.g., /blob/main/src/file.rs)"
 
     # Detect language first
     language = detect_language(file_path)
     if not language:
-        raise HTTPException(
-            status_code=400, detail=f"Unsupported file type: {file_path}"
-        )
+        return f"Unsupported file type: {file_path}"
+
+    return ParsedURL(owner, repo_name, file_path, language)
+
 
+def parsed_url(request: AnalyzeRequest) -> ParsedURL:
+    """Dependency validating a request's URL, before the route runs."""
+    parsed = _parse_url(request.github_url)
+    if isinstance(parsed, str):
+        raise HTTPException(status_code=400, detail=parsed)
+    return parsed
+
+
+async def _load_snapshots(
+    request: AnalyzeRequest, file_path: str, language: str
+) -> tuple[str, list[FunctionSnapshot], list[list[int]]]:
+    """
+    Get the entity type, snapshots and each snapshot's changed lines for a
+    request, from cache or GitHub.
+    """
     # Check cache first (only if not auto-detecting)
     entity_type = request.entity_type
-    snapshots = None
+    cached = None
     if entity_type != "auto":
-        snapshots = _get_cached_snapshots(
+        cached = await _get_cached_snapshots(
             request.github_url, request.function_name, entity_type
         )
 
-    if not snapshots:
+    if cached:
+        snapshots, changed_lines = cached
+    else:
         # Get entity evolution from GitHub
         try:
-            provider = GitHubProvider(request.github_url)
-            entity_type, snapshots = provider.get_function_evolution(
-                file_path, request.function_name, language, request.entity_type
+            entity_type, snapshots, changed_lines = await _fetch_evolution(
+                request.github_url,
+                file_path,
+                request.function_name,
+                language,
+                request.entity_type,
             )
         except Exception:
             raise HTTPException(
@@ -96,78 +262,249 @@ async def analyze_function(request: AnalyzeRequest):
             )
 
         # Cache snapshots for future requests
-        _cache_snapshots(
-            request.github_url, request.function_name, snapshots, entity_type
+        await _cache_snapshots(
+            request.github_url,
+            request.function_name,
+            snapshots,
+            changed_lines,
+            entity_type,
         )
 
-    # Build response with computed diffs
-    response_snapshots = []
-    for i, snapshot in enumerate(snapshots):
-        # Compute changed lines
-        prev_source = snapshots[i - 1].source if i > 0 else None
-        changed_lines = list(compute_changed_lines(prev_source, snapshot.source))
-
-        response_snapshots.append(
-            SnapshotSchema(
-                index=i,
-                commit=CommitSchema(
-                    hash=snapshot.commit.hash,
-                    short_hash=snapshot.commit.short_hash,
-                    date=snapshot.commit.timestamp,
-                    subject=snapshot.commit.subject,
-                    message=snapshot.commit.message,
-                    author=snapshot.commit.author_name,
-                ),
-                source=snapshot.source,
-                start_line=snapshot.start_line,
-                end_line=snapshot.end_line,
-                change_type=snapshot.change_type,
-                changed_lines=changed_lines,
-            )
-        )
+    return entity_type, snapshots, changed_lines
+
+
+def _snapshot_dicts(
+    snapshots: list[FunctionSnapshot], changed_lines: list[list[int]]
+) -> Iterator[dict]:
+    """Build the response snapshots one at a time, shaped like SnapshotSchema."""
+    for i, (snapshot, snapshot_changed_lines) in enumerate(
+        zip(snapshots, changed_lines)
+    ):
+        commit = snapshot.commit
+        yield {
+            "index": i,
+            "commit": {
+                "hash": commit.hash,
+                "short_hash": commit.short_hash,
+                "date": _json_datetime(commit.timestamp),
+                "subject": commit.subject,
+                "message": commit.message,
+                "author": commit.author_name,
+            },
+            "source": snapshot.source,
+            "start_line": snapshot.start_line,
+            "end_line": snapshot.end_line,
+            "change_type": snapshot.change_type,
+            "changed_lines": snapshot_changed_lines,
+        }
+
+
+def _json_datetime(value: datetime) -> str:
+    """Format a datetime the way Pydantic does, with "Z" for UTC."""
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def _ndjson_lines(
+    fields: dict, snapshots: list[FunctionSnapshot], changed_lines: list[list[int]]
+) -> Iterator[bytes]:
+    """Yield an analysis as ND-JSON: the response fields, then each snapshot."""
+    yield json_dumps(fields) + b"\n"
+    for snapshot in _snapshot_dicts(snapshots, changed_lines):
+        yield json_dumps(snapshot) + b"\n"
+
+
+def _analysis_response(
+    fields: dict,
+    snapshots: list[FunctionSnapshot],
+    changed_lines: list[list[int]],
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """
+    Build an analysis JSON response directly, skipping Pydantic validation
+    and serialization. The response_model schemas still document it.
+
+    This takes tens of milliseconds for long histories, so it's run in a
+    worker thread rather than on the event loop.
+    """
+    content = {**fields, "snapshots": list(_snapshot_dicts(snapshots, changed_lines))}
+    return Response(json_dumps(content), media_type="application/json", headers=headers)
+
+
+def _etag(*parts: str) -> str:
+    """Build an ETag from the values a response is derived from."""
+    digest = hashlib.sha1("\0".join(parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def _has_etag(http_request: Request, etag: str) -> bool:
+    """Check if the client already has the response with this ETag."""
+    if_none_match = http_request.headers.get("if-none-match", "")
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
 
-    return AnalyzeResponse(
-        function_name=request.function_name,
-        file_path=file_path,
-        repo=f"{owner}/{repo_name}",
-        entity_type=entity_type,
-        snapshots=response_snapshots,
+def _etag_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def _analysis_etag(
+    request: AnalyzeRequest, representation: str, entity_type: str, digest: str
+) -> str:
+    """ETag of an analysis, given the digest of its snapshots' history."""
+    return _etag(
+        representation,
+        request.github_url,
+        request.function_name,
+        request.entity_type,
+        entity_type,
+        digest,
     )
 
 
-@router.post("/summary", response_model=SummaryResponse)
-async def get_summary(request: SummaryRequest):
-    """Generate an LLM summary of the entity's evolution."""
-    # Parse the GitHub URL
+async def _summarize(
+    function_name: str,
+    file_path: str,
+    snapshots: list[FunctionSnapshot],
+    entity_type: str,
+    background_tasks: BackgroundTasks,
+) -> SummaryResponse:
+    """Generate the LLM summary of an entity's snapshots."""
     try:
-        owner, repo_name, branch, file_path = parse_github_url(request.github_url)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        summary = await generate_evolution_summary_async(
+            function_name,
+            file_path,
+            snapshots,
+            entity_type=entity_type,
+            run_later=background_tasks.add_task,
+        )
+        # Check if it was cached (summary starts with "(cached)")
+        cached = summary.startswith("(cached)")
+        if cached:
+            summary = summary[9:]  # Remove "(cached) " prefix
+        return SummaryResponse(summary=summary, cached=cached)
+    except Exception:
+        # Return empty summary on LLM errors
+        return SummaryResponse(summary=None, cached=False)
 
-    if not file_path:
-        raise HTTPException(status_code=400, detail="GitHub URL must include file path")
 
-    # Detect language
-    language = detect_language(file_path)
-    if not language:
-        raise HTTPException(
-            status_code=400, detail=f"Unsupported file type: {file_path}"
+@router.post("/analyze", response_model=AnalyzeResponse)
+async def analyze_function(
+    request: AnalyzeRequest,
+    http_request: Request,
+    url: Annotated[ParsedURL, Depends(parsed_url)],
+    accept: str | None = Header(default=None),
+):
+    """
+    Analyze an entity's evolution from a GitHub URL.
+
+    With "Accept: application/x-ndjson", the response is streamed as one
+    JSON line with the fields other than snapshots, then one per snapshot.
+    Responses carry an ETag, and "If-None-Match" with it gets a 304.
+    """
+    ndjson = bool(accept and "application/x-ndjson" in accept)
+    representation = "ndjson" if ndjson else "json"
+
+    # Answer revalidations of cached analyses before unpacking them
+    if request.entity_type != "auto":
+        digest = _get_cached_digest(
+            request.github_url, request.function_name, request.entity_type
+        )
+        if digest is not None:
+            etag = _analysis_etag(request, representation, request.entity_type, digest)
+            if _has_etag(http_request, etag):
+                return Response(status_code=304, headers=_etag_headers(etag))
+
+    entity_type, snapshots, changed_lines = await _load_snapshots(
+        request, url.file_path, url.language
+    )
+
+    etag = _analysis_etag(
+        request, representation, entity_type, _history_digest(snapshots)
+    )
+    headers = _etag_headers(etag)
+    if _has_etag(http_request, etag):
+        return Response(status_code=304, headers=headers)
+
+    fields = {
+        "function_name": request.function_name,
+        "file_path": url.file_path,
+        "repo": f"{url.owner}/{url.repo_name}",
+        "entity_type": entity_type,
+        "snapshots": [],
+    }
+    if ndjson:
+        # A sync iterator, so Starlette serializes it in a worker thread
+        return StreamingResponse(
+            _ndjson_lines(fields, snapshots, changed_lines),
+            media_type="application/x-ndjson",
+            headers=headers,
         )
 
+    return await run_in_threadpool(
+        _analysis_response, fields, snapshots, changed_lines, headers
+    )
+
+
+@router.post("/analyze_with_summary", response_model=AnalyzeSummaryResponse)
+async def analyze_with_summary(
+    request: AnalyzeRequest,
+    background_tasks: BackgroundTasks,
+    url: Annotated[ParsedURL, Depends(parsed_url)],
+):
+    """Analyze an entity's evolution and summarize it in one request."""
+    entity_type, snapshots, changed_lines = await _load_snapshots(
+        request, url.file_path, url.language
+    )
+
+    summary = await _summarize(
+        request.function_name, url.file_path, snapshots, entity_type, background_tasks
+    )
+    fields = {
+        "function_name": request.function_name,
+        "file_path": url.file_path,
+        "repo": f"{url.owner}/{url.repo_name}",
+        "entity_type": entity_type,
+        "snapshots": [],
+        "summary": summary.summary,
+        "cached": summary.cached,
+    }
+    return await run_in_threadpool(_analysis_response, fields, snapshots, changed_lines)
+
+
+@router.post("/summary", response_model=SummaryResponse)
+async def get_summary(
+    request: SummaryRequest,
+    background_tasks: BackgroundTasks,
+    http_request: Request,
+    response: Response,
+    url: Annotated[ParsedURL, Depends(parsed_url)],
+):
+    """
+    Generate an LLM summary of the entity's evolution.
+
+    Summaries carry an ETag, and "If-None-Match" with it gets a 304.
+    """
+    file_path = url.file_path
+
     # Try to get cached snapshots first (from recent /analyze call)
     entity_type = request.entity_type
     snapshots = None
     if entity_type != "auto":
-        snapshots = _get_cached_snapshots(
+        cached = await _get_cached_snapshots(
             request.github_url, request.function_name, entity_type
         )
+        if cached:
+            snapshots = cached[0]
 
     if not snapshots:
         # Fetch from GitHub if not cached
         try:
-            provider = GitHubProvider(request.github_url)
-            entity_type, snapshots = provider.get_function_evolution(
-                file_path, request.function_name, language, request.entity_type
+            entity_type, snapshots, _ = await _fetch_evolution(
+                request.github_url,
+                file_path,
+                request.function_name,
+                url.language,
+                request.entity_type,
             )
         except Exception:
             raise HTTPException(
@@ -180,16 +517,18 @@ async def get_summary(request: SummaryRequest):
             status_code=404, detail=f"'{request.function_name}' not found"
         )
 
+    # A summary is cached under this key once generated, so a client with
+    # its ETag already has it and the LLM needn't be asked again
+    etag = _etag(
+        summary_cache_key(request.function_name, file_path, snapshots, entity_type)
+    )
+    if _has_etag(http_request, etag):
+        return Response(status_code=304, headers=_etag_headers(etag))
+
     # Generate summary
-    try:
-        summary = generate_evolution_summary(
-            request.function_name, file_path, snapshots, entity_type=entity_type
-        )
-        # Check if it was cached (summary starts with "(cached)")
-        cached = summary.startswith("(cached)")
-        if cached:
-            summary = summary[9:]  # Remove "(cached) " prefix
-        return SummaryResponse(summary=summary, cached=cached)
-    except Exception:
-        # Return empty summary on LLM errors
-        return SummaryResponse(summary=None, cached=False)
+    summary = await _summarize(
+        request.function_name, file_path, snapshots, entity_type, background_tasks
+    )
+    if summary.summary:
+        response.headers.update(_etag_headers(etag))
+    return summary
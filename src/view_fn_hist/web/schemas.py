@@ -45,6 +45,13 @@ class AnalyzeResponse(BaseModel):
     snapshots: list[SnapshotSchema]
 
 
+class AnalyzeSummaryResponse(AnalyzeResponse):
+    """Response containing function evolution data and the LLM summary."""
+
+    summary: str | None
+    cached: bool
+
+
 class SummaryRequest(BaseModel):
     """Request to generate a summary."""
 
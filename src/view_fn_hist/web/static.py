@@ -0,0 +1,89 @@
+"""Static file serving with precompressed frontend assets."""
+
+import gzip
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # Optional Brotli assets (pip install gitmemory[fast])
+    brotli = None
+
+COMPRESSIBLE_SUFFIXES = {".js", ".css", ".html", ".svg", ".json", ".map"}
+
+# Encodings in order of preference, with the suffix of their precompressed file
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def _compressors() -> dict[str, Callable[[bytes], bytes]]:
+    """Get the compress function for each available encoding's suffix."""
+    compressors = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressors[".br"] = lambda data: brotli.compress(data, quality=11)
+    return compressors
+
+
+def precompress_assets(directory: Path):
+    """
+    Write compressed siblings (app.js.br, app.js.gz) of the text assets.
+
+    Files already compressed since they last changed are skipped, so this
+    only does real work after a frontend build.
+    """
+    compressors = _compressors()
+    for path in directory.rglob("*"):
+        if path.suffix not in COMPRESSIBLE_SUFFIXES or not path.is_file():
+            continue
+        try:
+            mtime = path.stat().st_mtime
+            data = None
+            for suffix, compress in compressors.items():
+                target = path.with_name(path.name + suffix)
+                if target.exists() and target.stat().st_mtime >= mtime:
+                    continue
+                if data is None:
+                    data = path.read_bytes()
+                target.write_bytes(compress(data))
+        except OSError:
+            return  # e.g. a read-only install; serve the files uncompressed
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves .br/.gz siblings to clients that accept them."""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if not isinstance(response, FileResponse) or response.status_code != 200:
+            return response
+
+        request_headers = Headers(scope=scope)
+        accepted = {
+            part.split(";")[0].strip()
+            for part in request_headers.get("accept-encoding", "").split(",")
+        }
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            compressed_path = f"{response.path}{suffix}"
+            try:
+                stat_result = os.stat(compressed_path)
+            except OSError:
+                continue
+            compressed = FileResponse(
+                compressed_path,
+                stat_result=stat_result,
+                media_type=response.media_type,
+                headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+            )
+            if self.is_not_modified(compressed.headers, request_headers):
+                return NotModifiedResponse(compressed.headers)
+            return compressed
+
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
@@ -0,0 +1,69 @@
+"""Shared fixtures: throwaway git repositories and isolated caches."""
+
+import os
+import subprocess
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from view_fn_hist import cache
+
+
+class GitRepo:
+    """A scratch git repository with one commit per call, a minute apart."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._minute = 0
+        path.mkdir()
+        self.git("init", "-q", "-b", "main")
+        self.git("config", "user.name", "Tester")
+        self.git("config", "user.email", "tester@example.com")
+
+    def git(self, *args: str) -> str:
+        self._minute += 1
+        date = f"2024-01-01T{self._minute // 60:02d}:{self._minute % 60:02d}:00"
+        env = {**os.environ, "GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date}
+        result = subprocess.run(
+            ["git", *args],
+            cwd=self.path,
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        return result.stdout.strip()
+
+    def commit(self, message: str, files: dict[str, str]) -> str:
+        """Write files and commit them, returning the new commit's hash."""
+        for name, content in files.items():
+            (self.path / name).write_text(content)
+        self.git("add", *files)
+        self.git("commit", "-q", "-m", message)
+        return self.git("rev-parse", "HEAD")
+
+
+@pytest.fixture
+def make_git_repo(tmp_path) -> Callable[[str], GitRepo]:
+    """Create scratch repositories by name."""
+    return lambda name: GitRepo(tmp_path / name)
+
+
+@pytest.fixture
+def git_repo(make_git_repo) -> GitRepo:
+    return make_git_repo("repo")
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch) -> Path:
+    """Point every on-disk cache at a temporary directory."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(cache, "CACHE_DIR", cache_dir)
+    monkeypatch.setattr(cache, "HISTORY_CACHE_DIR", cache_dir / "history")
+    monkeypatch.setattr(cache, "CONTENT_CACHE_DIR", cache_dir / "content")
+    monkeypatch.setattr(cache, "ENTITY_CACHE_FILE", cache_dir / "entities.sqlite")
+    monkeypatch.setattr(cache, "PROBE_CACHE_FILE", cache_dir / "llm_probe.json")
+    monkeypatch.setattr(cache, "_entity_db", threading.local())
+    return cache_dir
@@ -0,0 +1,137 @@
+"""Tests for function history analysis."""
+
+from view_fn_hist import analyzer
+from view_fn_hist.analyzer import analyze_function_history
+
+SOURCE = "def foo():\n    return 1\n\n\ndef bar():\n    return 2\n"
+
+
+def _changes(history) -> list[tuple[str, str]]:
+    return [(change.commit.subject, change.change_type) for change in history.changes]
+
+
+def test_tracks_created_modified_and_deleted(git_repo):
+    git_repo.commit("add foo", {"m.py": SOURCE})
+    git_repo.commit("edit bar", {"m.py": SOURCE.replace("return 2", "return 3")})
+    git_repo.commit("edit foo", {"m.py": SOURCE.replace("return 1", "return 9")})
+    git_repo.commit("drop foo", {"m.py": "def bar():\n    return 2\n"})
+
+    history = analyze_function_history(
+        str(git_repo.path), "m.py", "foo", use_cache=False
+    )
+
+    assert _changes(history) == [
+        ("drop foo", "deleted"),
+        ("edit foo", "modified"),
+        ("add foo", "created"),
+    ]
+
+
+def test_follows_function_moved_by_other_edits(git_repo):
+    git_repo.commit("add foo", {"m.py": SOURCE})
+    moved = "".join(f"X{i} = {i}\n" for i in range(10)) + SOURCE
+    git_repo.commit("insert above", {"m.py": moved})
+    git_repo.commit("edit foo", {"m.py": moved.replace("return 1", "return 9")})
+
+    history = analyze_function_history(
+        str(git_repo.path), "m.py", "foo", use_cache=False
+    )
+
+    assert ("edit foo", "modified") in _changes(history)
+    assert history.current_info.start_line == 11
+
+
+def test_branch_commit_in_merged_history(git_repo):
+    git_repo.commit("c0", {"m.py": SOURCE})
+    moved = "".join(f"X{i} = {i}\n" for i in range(10)) + SOURCE
+    git_repo.commit("c1", {"m.py": moved})
+    git_repo.git("checkout", "-q", "-b", "side", "HEAD~1")
+    git_repo.commit("b1", {"m.py": SOURCE.replace("return 1", "return 42")})
+    git_repo.git("checkout", "-q", "main")
+    git_repo.git("merge", "-q", "--no-edit", "side")
+
+    history = analyze_function_history(
+        str(git_repo.path), "m.py", "foo", use_cache=False
+    )
+
+    # b1 is walked after c1, but diffed against c0
+    assert ("b1", "modified") in _changes(history)
+
+
+def test_unchanged_range_skips_parsing_past_other_files(git_repo, monkeypatch):
+    source = SOURCE + "".join(f"X{i} = {i}\n" for i in range(10))
+    git_repo.commit("add foo", {"m.py": source})
+    for i in range(5):
+        git_repo.commit(f"other {i}", {"other.py": f"x = {i}\n"})
+        source += f"Y{i} = {i}\n"
+        git_repo.commit(f"append {i}", {"m.py": source})
+    git_repo.commit("edit foo", {"m.py": source.replace("return 1", "return 9")})
+
+    parsed = []
+    find = analyzer._find_function_in_blob
+
+    def counting_find(blob, *args):
+        parsed.append(blob.hexsha)
+        return find(blob, *args)
+
+    monkeypatch.setattr(analyzer, "_find_function_in_blob", counting_find)
+    history = analyze_function_history(
+        str(git_repo.path), "m.py", "foo", jobs=1, use_cache=False
+    )
+
+    assert _changes(history) == [("edit foo", "modified"), ("add foo", "created")]
+    # HEAD (for current_info), then "add foo" and "edit foo" in the walk
+    assert len(parsed) == 3
+
+
+def _edit_history(git_repo, commits: int):
+    """A history where every third commit edits foo and the rest edit bar."""
+    foo, bar = 1, 2
+    git_repo.commit("add", {"m.py": SOURCE})
+    for i in range(commits):
+        if i % 3 == 0:
+            foo = i + 10
+        else:
+            bar = i + 10
+        source = SOURCE.replace("return 1", f"return {foo}")
+        git_repo.commit(
+            f"change {i}", {"m.py": source.replace("return 2", f"return {bar}")}
+        )
+
+
+def test_parallel_walk_matches_serial_walk(git_repo, monkeypatch):
+    _edit_history(git_repo, 9)
+    monkeypatch.setattr(analyzer, "PARALLEL_MIN_COMMITS", 2)
+
+    serial = analyze_function_history(
+        str(git_repo.path), "m.py", "foo", jobs=1, use_cache=False
+    )
+    parallel = analyze_function_history(
+        str(git_repo.path), "m.py", "foo", jobs=2, use_cache=False
+    )
+
+    assert _changes(parallel) == _changes(serial)
+    assert [c.commit.subject for c in serial.changes] == [
+        "change 6",
+        "change 3",
+        "change 0",
+        "add",
+    ]
+
+
+def test_history_is_cached_until_head_moves(git_repo, monkeypatch):
+    _edit_history(git_repo, 3)
+    first = analyze_function_history(str(git_repo.path), "m.py", "foo")
+
+    def walk(*args, **kwargs):
+        raise AssertionError("history should come from the cache")
+
+    monkeypatch.setattr(analyzer, "walk_function_changes", walk)
+    assert _changes(analyze_function_history(str(git_repo.path), "m.py", "foo")) == (
+        _changes(first)
+    )
+
+    monkeypatch.undo()
+    git_repo.commit("later", {"m.py": SOURCE.replace("return 1", "return 99")})
+    history = analyze_function_history(str(git_repo.path), "m.py", "foo")
+    assert _changes(history)[0] == ("later", "modified")
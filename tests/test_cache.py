@@ -0,0 +1,82 @@
+"""Tests for the on-disk caches."""
+
+from view_fn_hist import cache
+from view_fn_hist.cache import (
+    content_cache_key,
+    entity_cache_key,
+    history_cache_key,
+    is_probe_cached,
+    load_cached_content,
+    load_cached_entities,
+    load_cached_history,
+    save_cached_content,
+    save_cached_entities,
+    save_cached_history,
+    save_probe_result,
+)
+
+
+def test_entity_cache_round_trip():
+    key = entity_cache_key("python", b"def foo(): pass\n")
+
+    assert load_cached_entities(key) is None
+    save_cached_entities(key, [["foo", "function", 1, 1]])
+    assert load_cached_entities(key) == [["foo", "function", 1, 1]]
+    assert load_cached_entities(entity_cache_key("rust", b"def foo(): pass\n")) is None
+
+
+def test_entity_cache_prunes_oldest_rows(monkeypatch):
+    monkeypatch.setattr(cache, "ENTITY_CACHE_MAX_ROWS", 3)
+    keys = [entity_cache_key("python", str(i).encode()) for i in range(5)]
+
+    for i, key in enumerate(keys):
+        save_cached_entities(key, [i])
+
+    assert [load_cached_entities(key) for key in keys] == [None, None, [2], [3], [4]]
+
+
+def test_history_cache_round_trip():
+    key = history_cache_key("repo", "HEAD-sha", "m.py", "foo")
+
+    assert load_cached_history(key) is None
+    save_cached_history(key, {"changes": [1, 2]})
+    assert load_cached_history(key) == {"changes": [1, 2]}
+    assert key != history_cache_key("repo", "other-sha", "m.py", "foo")
+
+
+def test_unreadable_history_is_a_miss(isolated_cache):
+    key = history_cache_key("broken")
+    (isolated_cache / "history").mkdir(parents=True)
+    (isolated_cache / "history" / f"{key}.pickle").write_bytes(b"not a pickle")
+
+    assert load_cached_history(key) is None
+
+
+def test_content_cache_round_trip():
+    key = content_cache_key("o/r", "sha", "m.py")
+    content = "line one\r\nline two\n"
+
+    assert load_cached_content(key) is None
+    save_cached_content(key, content)
+    assert load_cached_content(key) == content
+
+
+def test_probe_cache(monkeypatch):
+    assert not is_probe_cached("model", "key")
+    save_probe_result("model", "key")
+
+    assert is_probe_cached("model", "key")
+    assert not is_probe_cached("model", "other key")
+    monkeypatch.setattr(cache, "PROBE_TTL_SECONDS", -1)
+    assert not is_probe_cached("model", "key")
+
+
+def test_forked_process_opens_its_own_entity_connection(monkeypatch):
+    key = entity_cache_key("python", b"x = 1\n")
+    save_cached_entities(key, [1])
+    parent_connection = cache._entity_db.connection
+
+    monkeypatch.setattr(cache.os, "getpid", lambda: -1)  # As if forked
+
+    assert load_cached_entities(key) == [1]
+    assert cache._entity_db.connection is not parent_connection
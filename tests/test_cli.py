@@ -0,0 +1,116 @@
+"""Tests for the command-line interface."""
+
+from datetime import datetime
+
+import pytest
+
+from view_fn_hist import cli
+from view_fn_hist.cli import parse_argv
+from view_fn_hist.providers.git_provider import GitProvider
+
+
+def test_parse_clear_cache():
+    parsed = parse_argv(["--clear-cache", "https://github.com/o/r/blob/main/m.py", "f"])
+
+    assert parsed.clear_cache
+    assert parsed.args == ["https://github.com/o/r/blob/main/m.py", "f"]
+
+
+def test_clear_cache_on_its_own(isolated_cache, monkeypatch, capsys):
+    history_dir = isolated_cache / "history"
+    history_dir.mkdir(parents=True)
+    (history_dir / "old.pickle").write_bytes(b"stale")
+    monkeypatch.setattr("sys.argv", ["view-fn-hist", "--clear-cache"])
+
+    cli.main()
+
+    assert not history_dir.exists()
+    assert "Cleared" in capsys.readouterr().out
+
+
+def _run_main(monkeypatch, *args: str):
+    monkeypatch.setattr("sys.argv", ["view-fn-hist", *args])
+    cli.main()
+
+
+def test_plain_output_for_local_repo(git_repo, monkeypatch, capsys):
+    git_repo.commit("add foo", {"m.py": "def foo():\n    return 1\n"})
+    git_repo.commit("edit foo", {"m.py": "def foo():\n    return 2\n"})
+
+    _run_main(monkeypatch, str(git_repo.path), "m.py", "foo", "--plain", "--no-summary")
+
+    out = capsys.readouterr().out
+    assert "Found function with 2 versions" in out
+    assert "return 2" in out
+
+
+def test_no_cache_recomputes_history(git_repo, monkeypatch, capsys):
+    git_repo.commit("add foo", {"m.py": "def foo():\n    return 1\n"})
+    walks = []
+    walk = GitProvider._walk_function_evolution
+
+    def counting_walk(self, *args):
+        walks.append(args)
+        return walk(self, *args)
+
+    monkeypatch.setattr(GitProvider, "_walk_function_evolution", counting_walk)
+    args = (str(git_repo.path), "m.py", "foo", "--plain", "--no-summary")
+    _run_main(monkeypatch, *args)
+    _run_main(monkeypatch, *args)
+    assert len(walks) == 1
+
+    _run_main(monkeypatch, *args, "--no-cache")
+    assert len(walks) == 2
+    assert "return 1" in capsys.readouterr().out
+
+
+def test_missing_entity_exits_with_error(git_repo, monkeypatch, capsys):
+    git_repo.commit("add foo", {"m.py": "def foo():\n    return 1\n"})
+
+    with pytest.raises(SystemExit) as exit_info:
+        _run_main(monkeypatch, str(git_repo.path), "m.py", "bar", "--plain")
+
+    assert exit_info.value.code == 1
+    assert "No history found for 'bar'" in capsys.readouterr().err
+
+
+def test_parse_argv_options():
+    parsed = parse_argv(
+        [
+            "repo",
+            "m.py",
+            "foo",
+            "-t",
+            "class",
+            "--since=2024-01-02",
+            "--max-commits",
+            "5",
+        ]
+    )
+
+    assert parsed.args == ["repo", "m.py", "foo"]
+    assert parsed.type == "class"
+    assert parsed.since == datetime(2024, 1, 2)
+    assert parsed.max_commits == 5
+    assert not parsed.plain
+    assert not parsed.no_cache
+    assert parse_argv(["--no-cache", "repo"]).no_cache
+
+
+def test_parse_argv_double_dash_ends_options():
+    parsed = parse_argv(["--plain", "--", "repo", "-weird-name"])
+
+    assert parsed.plain
+    assert parsed.args == ["repo", "-weird-name"]
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [["--bogus"], ["--port"], ["--port", "http"], ["-t", "module"], ["--since=soon"]],
+)
+def test_parse_argv_errors_exit_like_argparse(argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        parse_argv(argv)
+
+    assert exit_info.value.code == 2
+    assert "usage:" in capsys.readouterr().err
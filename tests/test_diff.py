@@ -0,0 +1,43 @@
+"""Tests for line diffing between snapshots."""
+
+import pytest
+
+from view_fn_hist import diff
+from view_fn_hist.diff import compute_changed_lines
+
+
+@pytest.fixture(params=["rapidfuzz", "difflib"])
+def backend(request, monkeypatch):
+    """Run each test with the C diff (when installed) and the fallback."""
+    if request.param == "difflib":
+        monkeypatch.setattr(diff, "Levenshtein", None)
+    elif diff.Levenshtein is None:
+        pytest.skip("rapidfuzz is not installed")
+    return request.param
+
+
+def test_new_source_is_all_changed(backend):
+    assert compute_changed_lines(None, "a\nb\nc") == {0, 1, 2}
+
+
+def test_identical_source_is_unchanged(backend):
+    assert compute_changed_lines("a\nb", "a\nb") == set()
+
+
+def test_replaced_line(backend):
+    assert compute_changed_lines("a\nb\nc", "a\nB\nc") == {1}
+
+
+def test_inserted_lines(backend):
+    assert compute_changed_lines("a\nd", "a\nb\nc\nd") == {1, 2}
+
+
+def test_deleted_lines_mark_nothing_in_new_source(backend):
+    assert compute_changed_lines("a\nb\nc\nd", "a\nd") == set()
+
+
+def test_changes_at_both_ends(backend):
+    old = "a\nb\nc\nd\ne"
+    new = "A\nb\nc\nd\nE\nf"
+
+    assert compute_changed_lines(old, new) == {0, 4, 5}
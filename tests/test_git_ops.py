@@ -0,0 +1,102 @@
+"""Tests for git operations."""
+
+from view_fn_hist import git_ops
+from view_fn_hist.git_ops import (
+    DiffHunk,
+    get_blame_for_range,
+    get_diff_hunks,
+    get_file_commits,
+    get_repo,
+    shift_range_past_hunks,
+)
+
+
+def _hunk(old_start: int, old_count: int, new_start: int, new_count: int):
+    return DiffHunk(old_start, old_count, new_start, new_count, content="")
+
+
+def test_shift_range_past_hunks_above():
+    # Three lines inserted after line 1, two deleted at lines 3-4
+    hunks = [_hunk(1, 0, 2, 3), _hunk(3, 2, 5, 0)]
+
+    assert shift_range_past_hunks(hunks, 10, 12) == (11, 13)
+
+
+def test_shift_range_past_hunks_below():
+    assert shift_range_past_hunks([_hunk(20, 1, 20, 5)], 10, 12) == (10, 12)
+
+
+def test_shift_range_past_overlapping_hunk():
+    assert shift_range_past_hunks([_hunk(11, 1, 11, 1)], 10, 12) is None
+    assert shift_range_past_hunks([_hunk(8, 5, 8, 1)], 10, 12) is None
+
+
+def test_shift_range_through_real_diff(git_repo):
+    body = "".join(f"v{i} = {i}\n" for i in range(10)) + "def foo():\n    return 1\n"
+    git_repo.commit("add", {"m.py": body})
+    commit = git_repo.commit("insert above", {"m.py": "x = 1\ny = 2\n" + body})
+
+    hunks = get_diff_hunks(get_repo(str(git_repo.path)), commit, "m.py")
+
+    # foo was lines 11-12
+    assert shift_range_past_hunks(hunks, 11, 12) == (13, 14)
+    assert shift_range_past_hunks(hunks, 1, 2) is None
+
+
+def test_root_commit_hunks_ignore_working_tree(git_repo):
+    commit = git_repo.commit("add", {"m.py": "a = 1\nb = 2\n"})
+    (git_repo.path / "m.py").write_text("a = 1\nb = 2\nc = 3\n")
+
+    hunks = get_diff_hunks(get_repo(str(git_repo.path)), commit, "m.py")
+
+    assert [(h.old_start, h.old_count, h.new_start, h.new_count) for h in hunks] == [
+        (0, 0, 1, 2)
+    ]
+    assert hunks[0].content == "+a = 1\n+b = 2\n"
+
+
+def test_blame_for_range(git_repo):
+    first = git_repo.commit("add", {"m.py": "a = 1\nb = 2\n"})
+    second = git_repo.commit("edit", {"m.py": "a = 1\nb = 3\nc = 4\n"})
+
+    blame = get_blame_for_range(get_repo(str(git_repo.path)), "m.py", 1, 3)
+
+    assert [(line.line_number, line.content) for line in blame] == [
+        (1, "a = 1"),
+        (2, "b = 3"),
+        (3, "c = 4"),
+    ]
+    assert [line.commit.hash for line in blame] == [first, second, second]
+
+
+def test_blame_range_past_end_of_file(git_repo):
+    git_repo.commit("add", {"m.py": "a = 1\nb = 2"})
+    repo = get_repo(str(git_repo.path))
+
+    blame = get_blame_for_range(repo, "m.py", 2, 10)
+
+    assert [(line.line_number, line.content) for line in blame] == [(2, "b = 2")]
+    assert get_blame_for_range(repo, "m.py", 5, 10) == []
+    assert get_blame_for_range(repo, "missing.py", 1, 10) == []
+
+
+def test_repo_and_commit_caches_are_bounded(git_repo, make_git_repo, monkeypatch):
+    monkeypatch.setattr(git_ops, "REPO_CACHE_SIZE", 1)
+    monkeypatch.setattr(git_ops, "COMMIT_INFO_CACHE_SIZE", 2)
+    monkeypatch.setattr(git_ops, "_repos", {})
+    monkeypatch.setattr(git_ops, "_commit_infos", {})
+    for i in range(3):
+        git_repo.commit(f"change {i}", {"m.py": f"a = {i}\n"})
+
+    repo = get_repo(str(git_repo.path))
+    commits = get_file_commits(repo, "m.py")
+    other = make_git_repo("other")
+    get_repo(str(other.path))
+
+    assert [commit.subject for commit in commits] == [
+        "change 2",
+        "change 1",
+        "change 0",
+    ]
+    assert len(git_ops._commit_infos) == 2
+    assert list(git_ops._repos) == [other.path.resolve()]
@@ -0,0 +1,76 @@
+"""Tests for the local git provider."""
+
+from view_fn_hist.providers import git_provider
+from view_fn_hist.providers.git_provider import GitProvider
+
+SOURCE = "def foo():\n    return 1\n\n\ndef bar():\n    return 2\n"
+
+
+def _counting_finder(monkeypatch) -> list[str]:
+    """Record each source the provider parses."""
+    parsed: list[str] = []
+    prepare = git_provider.prepare_finder
+
+    def prepare_finder(*args):
+        find = prepare(*args)
+
+        def counting_find(source):
+            parsed.append(source)
+            return find(source)
+
+        return counting_find
+
+    monkeypatch.setattr(git_provider, "prepare_finder", prepare_finder)
+    return parsed
+
+
+def test_unchanged_range_skips_parsing_past_other_files(git_repo, monkeypatch):
+    source = SOURCE + "".join(f"X{i} = {i}\n" for i in range(10))
+    git_repo.commit("add foo", {"m.py": source})
+    for i in range(5):
+        git_repo.commit(f"other {i}", {"other.py": f"x = {i}\n"})
+        source += f"Y{i} = {i}\n"
+        git_repo.commit(f"append {i}", {"m.py": source})
+    git_repo.commit("edit foo", {"m.py": source.replace("return 1", "return 9")})
+    parsed = _counting_finder(monkeypatch)
+
+    _, snapshots = GitProvider(str(git_repo.path)).get_function_evolution(
+        "m.py", "foo", "python"
+    )
+
+    assert [s.commit.subject for s in snapshots] == ["add foo", "edit foo"]
+    assert len(parsed) == 2
+
+
+def test_branch_commit_in_merged_history(git_repo):
+    git_repo.commit("c0", {"m.py": SOURCE})
+    moved = "".join(f"X{i} = {i}\n" for i in range(10)) + SOURCE
+    git_repo.commit("c1", {"m.py": moved})
+    git_repo.git("checkout", "-q", "-b", "side", "HEAD~1")
+    git_repo.commit("b1", {"m.py": SOURCE.replace("return 1", "return 42")})
+    git_repo.git("checkout", "-q", "main")
+    git_repo.git("merge", "-q", "--no-edit", "side")
+
+    _, snapshots = GitProvider(str(git_repo.path)).get_function_evolution(
+        "m.py", "foo", "python"
+    )
+
+    # b1 is walked after c1, but diffed against c0
+    assert "b1" in [s.commit.subject for s in snapshots]
+
+
+def test_evolution_is_cached_until_head_moves(git_repo, monkeypatch):
+    git_repo.commit("add foo", {"m.py": SOURCE})
+    provider = GitProvider(str(git_repo.path))
+    first = provider.get_function_evolution("m.py", "foo", "python")
+    parsed = _counting_finder(monkeypatch)
+
+    assert provider.get_function_evolution("m.py", "foo", "python") == first
+    assert not parsed
+
+    provider.get_function_evolution("m.py", "foo", "python", use_cache=False)
+    assert parsed
+
+    git_repo.commit("edit foo", {"m.py": SOURCE.replace("return 1", "return 9")})
+    _, snapshots = provider.get_function_evolution("m.py", "foo", "python")
+    assert [s.commit.subject for s in snapshots] == ["add foo", "edit foo"]
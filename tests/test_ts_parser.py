@@ -0,0 +1,50 @@
+"""Tests for tree-sitter parsing."""
+
+import pytest
+
+from view_fn_hist import ts_parser
+
+OLD = b"def foo():\n    return 1\n"
+NEW = b"x = 1\n\n\ndef foo():\n    return 2\n"
+
+
+class FailingParser:
+    """A parser whose parses fail."""
+
+    def parse(self, source, old_tree=None):
+        raise RuntimeError("parse failed")
+
+
+def _nodes(node) -> list[tuple]:
+    """Every node's type and position, for comparing trees."""
+    nodes = [(node.type, node.start_byte, node.end_byte)]
+    for child in node.children:
+        nodes.extend(_nodes(child))
+    return nodes
+
+
+def _full_parse(source: bytes) -> list[tuple]:
+    return _nodes(ts_parser.get_parser("python").parse(source).root_node)
+
+
+def test_incremental_parse_matches_full_parse():
+    ts_parser._parse("python", OLD)
+
+    tree = ts_parser._parse("python", NEW)
+
+    assert _nodes(tree.root_node) == _full_parse(NEW)
+
+
+def test_failed_parse_does_not_corrupt_later_parses(monkeypatch):
+    ts_parser._parse("python", OLD)
+    parsers = ts_parser._last_parse.parsers
+    real_parser = parsers["python"]
+
+    monkeypatch.setitem(parsers, "python", FailingParser())
+    with pytest.raises(RuntimeError):
+        ts_parser._parse("python", NEW)
+    parsers["python"] = real_parser
+
+    for source in (OLD, NEW):
+        tree = ts_parser._parse("python", source)
+        assert _nodes(tree.root_node) == _full_parse(source)
@@ -0,0 +1,236 @@
+"""Tests for the web API routes."""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from view_fn_hist.providers import FunctionSnapshot
+from view_fn_hist.providers.base import CommitInfo
+from view_fn_hist.web import routes
+from view_fn_hist.web.app import app
+from view_fn_hist.web.schemas import SummaryResponse
+
+URL = "https://github.com/o/r/blob/main/m.py"
+BODY = {"github_url": URL, "function_name": "foo"}
+
+
+def _snapshot(n: int, source: str) -> FunctionSnapshot:
+    commit = CommitInfo(
+        hash=f"{n:040x}",
+        short_hash=f"{n:07x}",
+        author_name="Tester",
+        author_email="tester@example.com",
+        timestamp=datetime(2024, 1, n, tzinfo=timezone.utc),
+        message=f"change {n}",
+        subject=f"change {n}",
+    )
+    return FunctionSnapshot(
+        commit=commit,
+        source=source,
+        start_line=1,
+        end_line=source.count("\n") + 1,
+        change_type="created" if n == 1 else "modified",
+    )
+
+
+@pytest.fixture
+def fetches(monkeypatch) -> list[str]:
+    """Serve a two-snapshot history instead of GitHub, counting fetches."""
+    calls = []
+    snapshots = [
+        _snapshot(1, "def foo():\n    return 1"),
+        _snapshot(2, "def foo():\n    return 2"),
+    ]
+
+    def get_evolution(url, file_path, func, language, entity_type):
+        calls.append(func)
+        return "function", snapshots, routes._changed_lines(snapshots)
+
+    monkeypatch.setattr(routes, "_get_evolution", get_evolution)
+    monkeypatch.setattr(routes, "_snapshot_cache", OrderedDict())
+    monkeypatch.setattr(routes, "_snapshot_cache_bytes", 0)
+    return calls
+
+
+@pytest.fixture
+def summaries(monkeypatch) -> list[str]:
+    """Replace the LLM summary with a fixed one, counting requests."""
+    calls = []
+
+    async def summarize(function_name, *args):
+        calls.append(function_name)
+        return SummaryResponse(summary="Returns a number.", cached=False)
+
+    monkeypatch.setattr(routes, "_summarize", summarize)
+    return calls
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture
+def slow_evolution(monkeypatch):
+    """Replace the GitHub fetch with one that waits to be released."""
+    release = threading.Event()
+    calls = []
+
+    def get_evolution(url, file_path, func, language, entity_type):
+        calls.append(func)
+        release.wait(5)
+        return "function", [], []
+
+    monkeypatch.setattr(routes, "_get_evolution", get_evolution)
+    return release, calls
+
+
+def _fetch(func: str = "foo"):
+    return routes._fetch_evolution(
+        "https://github.com/o/r/blob/main/m.py", "m.py", func, "python", "function"
+    )
+
+
+def test_identical_fetches_are_coalesced(slow_evolution):
+    release, calls = slow_evolution
+
+    async def run():
+        first = asyncio.ensure_future(_fetch())
+        second = asyncio.ensure_future(_fetch())
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(run()) == [("function", [], [])] * 2
+    assert calls == ["foo"]
+    assert not routes._inflight
+
+
+def test_cancelled_owner_does_not_cancel_waiters(slow_evolution):
+    release, calls = slow_evolution
+
+    async def run():
+        owner = asyncio.ensure_future(_fetch())
+        await asyncio.sleep(0.05)
+        waiter = asyncio.ensure_future(_fetch())
+        await asyncio.sleep(0.05)
+        owner.cancel()
+        await asyncio.sleep(0.05)
+        release.set()
+        return await waiter, owner.cancelled()
+
+    assert asyncio.run(run()) == (("function", [], []), True)
+    assert calls == ["foo"]
+    assert not routes._inflight
+
+
+def test_failed_fetch_is_not_reused(monkeypatch):
+    calls = []
+
+    def get_evolution(*args):
+        calls.append(args)
+        raise RuntimeError("GitHub is down")
+
+    monkeypatch.setattr(routes, "_get_evolution", get_evolution)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            asyncio.run(_fetch())
+    assert len(calls) == 2
+    assert not routes._inflight
+
+
+def test_analyze_returns_snapshots_and_changed_lines(client, fetches):
+    response = client.post("/api/analyze", json=BODY)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["repo"] == "o/r"
+    assert [s["commit"]["date"] for s in data["snapshots"]] == [
+        "2024-01-01T00:00:00Z",
+        "2024-01-02T00:00:00Z",
+    ]
+    assert [s["changed_lines"] for s in data["snapshots"]] == [[0, 1], [1]]
+
+
+def test_analyze_revalidation_skips_fetch(client, fetches):
+    first = client.post("/api/analyze", json=BODY)
+    etag = first.headers["etag"]
+
+    again = client.post("/api/analyze", json=BODY, headers={"If-None-Match": etag})
+
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+    assert fetches == ["foo"]
+
+
+def test_analyze_stale_etag_gets_full_response(client, fetches):
+    response = client.post(
+        "/api/analyze", json=BODY, headers={"If-None-Match": '"stale"'}
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()["snapshots"]) == 2
+
+
+def test_analyze_ndjson(client, fetches):
+    response = client.post(
+        "/api/analyze", json=BODY, headers={"Accept": "application/x-ndjson"}
+    )
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert len(lines) == 3
+    assert '"snapshots":[]' in lines[0].replace(" ", "")
+    # The JSON representation has its own ETag
+    json_response = client.post("/api/analyze", json=BODY)
+    assert response.headers["etag"] != json_response.headers["etag"]
+
+
+def test_summary_revalidation_skips_llm(client, fetches, summaries):
+    first = client.post("/api/summary", json=BODY)
+    assert first.json() == {"summary": "Returns a number.", "cached": False}
+
+    again = client.post(
+        "/api/summary", json=BODY, headers={"If-None-Match": first.headers["etag"]}
+    )
+
+    assert again.status_code == 304
+    assert summaries == ["foo"]
+
+
+def test_invalid_url_is_rejected(client, fetches):
+    response = client.post(
+        "/api/analyze", json={"github_url": URL[:-5], "function_name": "foo"}
+    )
+
+    assert response.status_code == 400
+    assert fetches == []
+
+
+def test_analyze_serves_repeat_requests_from_cache(client, fetches):
+    first = client.post("/api/analyze", json=BODY)
+    second = client.post("/api/analyze", json=BODY)
+
+    assert second.json() == first.json()
+    assert fetches == ["foo"]
+
+
+def test_json_responses_are_gzipped_but_ndjson_streams_are_not(client, fetches):
+    headers = {"Accept-Encoding": "gzip"}
+    body = {**BODY, "function_name": "foo" * 400}  # Long enough to compress
+
+    response = client.post("/api/analyze", json=body, headers=headers)
+    stream = client.post(
+        "/api/analyze",
+        json=body,
+        headers={**headers, "Accept": "application/x-ndjson"},
+    )
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in stream.headers